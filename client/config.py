@@ -2,56 +2,114 @@
 Client configuration for ChaseHome game
 """
 import os
+from typing import NamedTuple, Tuple
 
-# Window settings
-WINDOW_WIDTH = 1024
-WINDOW_HEIGHT = 768
-WINDOW_TITLE = "ChaseHome"
-FPS = 60
-
-# Game settings
-PLAYER_SPEED = 200  # pixels per second
-PLAYER_SIZE = (32, 48)
-
-# Network settings
-SERVER_URL = os.getenv("SERVER_URL", "ws://localhost:8000")
-RECONNECT_DELAY = 5
-
-# Colors (RGB)
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-RED = (255, 0, 0)
-GREEN = (0, 255, 0)
-BLUE = (0, 0, 255)
-YELLOW = (255, 255, 0)
-PURPLE = (128, 0, 128)
-GRAY = (128, 128, 128)
-DARK_GRAY = (64, 64, 64)
-LIGHT_GRAY = (192, 192, 192)
-
-# UI Colors
-UI_BACKGROUND = (32, 32, 32)
-UI_PANEL = (48, 48, 48)
-UI_BUTTON = (64, 64, 64)
-UI_BUTTON_HOVER = (80, 80, 80)
-UI_BUTTON_ACTIVE = (96, 96, 96)
-UI_TEXT = WHITE
-UI_TEXT_DISABLED = GRAY
-
-# Task Colors
-TASK_INCOMPLETE = YELLOW
-TASK_COMPLETE = GREEN
-TASK_INTERACTION = BLUE
-
-# Jumpscare settings
-JUMPSCARE_DURATION = 2.0  # seconds
-SCREEN_SHAKE_INTENSITY = 10  # pixels
-
-# Audio settings
-MASTER_VOLUME = 0.7
-SFX_VOLUME = 0.8
-MUSIC_VOLUME = 0.5
-
-# Input settings
-INTERACT_KEY = "e"
-MENU_KEY = "escape"
\ No newline at end of file
+class ClientConfig(NamedTuple):
+    """Immutable client settings; tuple fields give fast reads and cannot be reassigned"""
+    # Window settings
+    WINDOW_WIDTH: int = 1024
+    WINDOW_HEIGHT: int = 768
+    WINDOW_TITLE: str = "ChaseHome"
+    FPS: int = 60
+    BACKGROUND_FPS: int = 10  # frame cap while the window is unfocused or minimized
+    FIXED_DT: float = 1 / 60  # seconds per simulation step, independent of render rate
+    MAX_FRAME_TIME: float = 0.25  # cap on simulated time per frame after a stall
+
+    # Game settings
+    PLAYER_SPEED: int = 200  # pixels per second
+    PLAYER_SIZE: Tuple[int, int] = (32, 48)
+    ENTITY_CULL_MARGIN: int = 100  # pixels drawn past the screen edge before culling
+    INTERACT_DISTANCE: int = 50  # max pixels from player center to a task center
+
+    # Network settings
+    SERVER_URL: str = os.getenv("SERVER_URL", "ws://localhost:8000")
+    RECONNECT_DELAY: int = 5
+    MOVE_SEND_INTERVAL: float = 1 / 20  # seconds between position updates (20 Hz)
+    MOVE_SEND_EPSILON: float = 0.5  # pixels moved before a new position is sent
+    REMOTE_PLAYER_SMOOTHING: float = 10.0  # rate (1/s) remote players ease toward network positions
+
+    # Colors (RGB)
+    BLACK: Tuple[int, int, int] = (0, 0, 0)
+    WHITE: Tuple[int, int, int] = (255, 255, 255)
+    RED: Tuple[int, int, int] = (255, 0, 0)
+    GREEN: Tuple[int, int, int] = (0, 255, 0)
+    BLUE: Tuple[int, int, int] = (0, 0, 255)
+    YELLOW: Tuple[int, int, int] = (255, 255, 0)
+    PURPLE: Tuple[int, int, int] = (128, 0, 128)
+    GRAY: Tuple[int, int, int] = (128, 128, 128)
+    DARK_GRAY: Tuple[int, int, int] = (64, 64, 64)
+    LIGHT_GRAY: Tuple[int, int, int] = (192, 192, 192)
+
+    # UI Colors
+    UI_BACKGROUND: Tuple[int, int, int] = (32, 32, 32)
+    UI_PANEL: Tuple[int, int, int] = (48, 48, 48)
+    UI_BUTTON: Tuple[int, int, int] = (64, 64, 64)
+    UI_BUTTON_HOVER: Tuple[int, int, int] = (80, 80, 80)
+    UI_BUTTON_ACTIVE: Tuple[int, int, int] = (96, 96, 96)
+    UI_TEXT: Tuple[int, int, int] = WHITE
+    UI_TEXT_DISABLED: Tuple[int, int, int] = GRAY
+
+    # Task Colors
+    TASK_INCOMPLETE: Tuple[int, int, int] = YELLOW
+    TASK_COMPLETE: Tuple[int, int, int] = GREEN
+    TASK_INTERACTION: Tuple[int, int, int] = BLUE
+
+    # Jumpscare settings
+    JUMPSCARE_DURATION: float = 2.0  # seconds
+    SCREEN_SHAKE_INTENSITY: int = 10  # pixels
+
+    # Audio settings
+    MASTER_VOLUME: float = 0.7
+    SFX_VOLUME: float = 0.8
+    MUSIC_VOLUME: float = 0.5
+
+    # Input settings
+    INTERACT_KEY: str = "e"
+    MENU_KEY: str = "escape"
+
+CFG = ClientConfig()
+
+# Module-level names for `from client.config import ...`
+WINDOW_WIDTH = CFG.WINDOW_WIDTH
+WINDOW_HEIGHT = CFG.WINDOW_HEIGHT
+WINDOW_TITLE = CFG.WINDOW_TITLE
+FPS = CFG.FPS
+BACKGROUND_FPS = CFG.BACKGROUND_FPS
+FIXED_DT = CFG.FIXED_DT
+MAX_FRAME_TIME = CFG.MAX_FRAME_TIME
+PLAYER_SPEED = CFG.PLAYER_SPEED
+PLAYER_SIZE = CFG.PLAYER_SIZE
+ENTITY_CULL_MARGIN = CFG.ENTITY_CULL_MARGIN
+INTERACT_DISTANCE = CFG.INTERACT_DISTANCE
+SERVER_URL = CFG.SERVER_URL
+RECONNECT_DELAY = CFG.RECONNECT_DELAY
+MOVE_SEND_INTERVAL = CFG.MOVE_SEND_INTERVAL
+MOVE_SEND_EPSILON = CFG.MOVE_SEND_EPSILON
+REMOTE_PLAYER_SMOOTHING = CFG.REMOTE_PLAYER_SMOOTHING
+BLACK = CFG.BLACK
+WHITE = CFG.WHITE
+RED = CFG.RED
+GREEN = CFG.GREEN
+BLUE = CFG.BLUE
+YELLOW = CFG.YELLOW
+PURPLE = CFG.PURPLE
+GRAY = CFG.GRAY
+DARK_GRAY = CFG.DARK_GRAY
+LIGHT_GRAY = CFG.LIGHT_GRAY
+UI_BACKGROUND = CFG.UI_BACKGROUND
+UI_PANEL = CFG.UI_PANEL
+UI_BUTTON = CFG.UI_BUTTON
+UI_BUTTON_HOVER = CFG.UI_BUTTON_HOVER
+UI_BUTTON_ACTIVE = CFG.UI_BUTTON_ACTIVE
+UI_TEXT = CFG.UI_TEXT
+UI_TEXT_DISABLED = CFG.UI_TEXT_DISABLED
+TASK_INCOMPLETE = CFG.TASK_INCOMPLETE
+TASK_COMPLETE = CFG.TASK_COMPLETE
+TASK_INTERACTION = CFG.TASK_INTERACTION
+JUMPSCARE_DURATION = CFG.JUMPSCARE_DURATION
+SCREEN_SHAKE_INTENSITY = CFG.SCREEN_SHAKE_INTENSITY
+MASTER_VOLUME = CFG.MASTER_VOLUME
+SFX_VOLUME = CFG.SFX_VOLUME
+MUSIC_VOLUME = CFG.MUSIC_VOLUME
+INTERACT_KEY = CFG.INTERACT_KEY
+MENU_KEY = CFG.MENU_KEY
\ No newline at end of file
@@ -2,14 +2,38 @@
 Player entity for ChaseHome game
 """
 import pygame
-import sys
-import os
-from typing import Dict, Any
-# Fix imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from client.config import PLAYER_SPEED, PLAYER_SIZE
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from client.config import (PLAYER_SPEED, PLAYER_SIZE, WINDOW_WIDTH, WINDOW_HEIGHT, 
+                           REMOTE_PLAYER_SMOOTHING, INTERACT_DISTANCE)
+
+def _build_direction_table():
+    """Unit movement vectors indexed by key mask: up=1, down=2, left=4, right=8"""
+    diagonal = 0.5 ** 0.5
+    table = []
+    for mask in range(16):
+        dx = ((mask >> 3) & 1) - ((mask >> 2) & 1)
+        dy = ((mask >> 1) & 1) - (mask & 1)
+        # Normalize diagonals so they are not faster than straight movement
+        scale = diagonal if dx and dy else 1
+        table.append((dx * scale, dy * scale))
+    return tuple(table)
+
+_DIR_TABLE = _build_direction_table()
 
 class Player:
+    __slots__ = (
+        "x", "y", "uid", "username", "is_local",
+        "width", "height", "color",
+        "velocity_x", "velocity_y", "target_x", "target_y", "prev_x", "prev_y",
+        "current_task", "is_interacting",
+        "_name_surface", "_name_key", "_rect", "surface",
+    )
+    
+    # Shared username font, created lazily once pygame.font is initialized
+    _font = None
+    # Pre-rendered body surfaces keyed by (is_local, size)
+    _surface_cache: Dict[Tuple[bool, Tuple[int, int]], pygame.Surface] = {}
+    
     def __init__(self, x: float, y: float, uid: str, username: str, is_local: bool = False):
         self.x = x
         self.y = y
@@ -25,87 +49,169 @@ class Player:
         self.velocity_x = 0
         self.velocity_y = 0
         
+        # Latest network position; remote players ease toward it in update
+        self.target_x = x
+        self.target_y = y
+        
+        # Position before the latest simulation step, for render interpolation
+        self.prev_x = x
+        self.prev_y = y
+        
         # Game state
         self.current_task = None
         self.is_interacting = False
         
-        # Create player surface
-        self.surface = pygame.Surface((self.width, self.height))
-        self.surface.fill(self.color)
+        # Cached username text surface, re-rendered only when (text, color) changes
+        self._name_surface = None
+        self._name_key = None
+        
+        # Collision rect, moved in place by get_rect
+        self._rect = pygame.Rect(0, 0, self.width, self.height)
+        
+        # Shared read-only body surface; only local/remote variants exist
+        self.surface = Player._get_surface(is_local, (self.width, self.height))
+    
+    @classmethod
+    def _get_surface(cls, is_local: bool, size: Tuple[int, int]) -> pygame.Surface:
+        """Get the shared player surface, rendering it on first use"""
+        key = (is_local, size)
+        surface = cls._surface_cache.get(key)
+        if surface is None:
+            surface = cls._render_surface(is_local, size)
+            cls._surface_cache[key] = surface
+        return surface
+    
+    @staticmethod
+    def _render_surface(is_local: bool, size: Tuple[int, int]) -> pygame.Surface:
+        """Render a player body with a simple face"""
+        width, height = size
+        surface = pygame.Surface(size)
+        try:
+            # Match the display pixel format so blits take SDL's fast path
+            surface = surface.convert()
+        except pygame.error:
+            pass  # No display mode set yet (e.g. headless tests)
+        surface.fill((0, 255, 0) if is_local else (0, 0, 255))
         
         # Add a simple face
         if is_local:
             # Local player - green with yellow face
-            pygame.draw.circle(self.surface, (255, 255, 0), (self.width//2, self.height//3), 8)
-            pygame.draw.circle(self.surface, (0, 0, 0), (self.width//2 - 3, self.height//3 - 2), 2)
-            pygame.draw.circle(self.surface, (0, 0, 0), (self.width//2 + 3, self.height//3 - 2), 2)
+            pygame.draw.circle(surface, (255, 255, 0), (width//2, height//3), 8)
         else:
             # Other players - blue with white face
-            pygame.draw.circle(self.surface, (255, 255, 255), (self.width//2, self.height//3), 8)
-            pygame.draw.circle(self.surface, (0, 0, 0), (self.width//2 - 3, self.height//3 - 2), 2)
-            pygame.draw.circle(self.surface, (0, 0, 0), (self.width//2 + 3, self.height//3 - 2), 2)
+            pygame.draw.circle(surface, (255, 255, 255), (width//2, height//3), 8)
+        pygame.draw.circle(surface, (0, 0, 0), (width//2 - 3, height//3 - 2), 2)
+        pygame.draw.circle(surface, (0, 0, 0), (width//2 + 3, height//3 - 2), 2)
+        
+        return surface
     
-    def update(self, dt: float, keys_pressed: Dict[int, bool] = None):
-        """Update player state"""
-        if self.is_local and keys_pressed:
+    def update(self, dt: float, keys: Optional[Sequence[bool]] = None, 
+               _speed: float = PLAYER_SPEED, _max_x: int = WINDOW_WIDTH, _max_y: int = WINDOW_HEIGHT, 
+               _dir_table: Tuple[Tuple[float, float], ...] = _DIR_TABLE, 
+               _smoothing: float = REMOTE_PLAYER_SMOOTHING):
+        """Update player state.
+        
+        keys is the sequence returned by pygame.key.get_pressed(), polled once per frame.
+        The underscore arguments bind constants as locals and should not be passed.
+        """
+        self.prev_x = self.x
+        self.prev_y = self.y
+        
+        if self.is_local and keys is not None:
             # Handle local player movement
-            self.velocity_x = 0
-            self.velocity_y = 0
-            
-            if keys_pressed.get(pygame.K_a) or keys_pressed.get(pygame.K_LEFT):
-                self.velocity_x = -PLAYER_SPEED
-            if keys_pressed.get(pygame.K_d) or keys_pressed.get(pygame.K_RIGHT):
-                self.velocity_x = PLAYER_SPEED
-            if keys_pressed.get(pygame.K_w) or keys_pressed.get(pygame.K_UP):
-                self.velocity_y = -PLAYER_SPEED
-            if keys_pressed.get(pygame.K_s) or keys_pressed.get(pygame.K_DOWN):
-                self.velocity_y = PLAYER_SPEED
+            mask = ((keys[pygame.K_w] or keys[pygame.K_UP])
+                    | (keys[pygame.K_s] or keys[pygame.K_DOWN]) << 1
+                    | (keys[pygame.K_a] or keys[pygame.K_LEFT]) << 2
+                    | (keys[pygame.K_d] or keys[pygame.K_RIGHT]) << 3)
+            move_x, move_y = _dir_table[mask]
+            self.velocity_x = velocity_x = move_x * _speed
+            self.velocity_y = velocity_y = move_y * _speed
             
-            # Update position
-            self.x += self.velocity_x * dt
-            self.y += self.velocity_y * dt
-            
-            # Keep player on screen (basic boundary check)
-            self.x = max(0, min(self.x, 1024 - self.width))
-            self.y = max(0, min(self.y, 768 - self.height))
+            # Update position, keeping player on screen (basic boundary check)
+            self.x = max(0, min(self.x + velocity_x * dt, _max_x - self.width))
+            self.y = max(0, min(self.y + velocity_y * dt, _max_y - self.height))
+        
+        elif not self.is_local:
+            # Ease remote players toward their last network position
+            blend = min(1.0, dt * _smoothing)
+            self.x += (self.target_x - self.x) * blend
+            self.y += (self.target_y - self.y) * blend
     
     def set_position(self, x: float, y: float):
-        """Set player position (for network updates)"""
-        self.x = x
-        self.y = y
+        """Set player position immediately"""
+        self.x = self.target_x = self.prev_x = x
+        self.y = self.target_y = self.prev_y = y
     
-    def get_rect(self) -> pygame.Rect:
-        """Get player rectangle for collision detection"""
-        return pygame.Rect(self.x, self.y, self.width, self.height)
+    def set_target_position(self, x: float, y: float):
+        """Set the position a remote player moves toward (for network updates)"""
+        self.target_x = x
+        self.target_y = y
     
-    def draw(self, screen: pygame.Surface, camera_x: float = 0, camera_y: float = 0):
-        """Draw the player"""
-        # Calculate screen position
-        screen_x = self.x - camera_x
-        screen_y = self.y - camera_y
-        
-        # Draw player
-        screen.blit(self.surface, (screen_x, screen_y))
+    def get_rect(self) -> pygame.Rect:
+        """Get player rectangle for collision detection.
         
-        # Draw username
-        font = pygame.font.Font(None, 20)
+        The same Rect is reused on every call; copy it if it must outlive the frame.
+        """
+        self._rect.x = int(self.x)
+        self._rect.y = int(self.y)
+        return self._rect
+    
+    def get_render_position(self, alpha: float = 1.0) -> Tuple[float, float]:
+        """Get the position blended between the last two simulation steps by alpha"""
+        prev_x = self.prev_x
+        prev_y = self.prev_y
+        return prev_x + (self.x - prev_x) * alpha, prev_y + (self.y - prev_y) * alpha
+    
+    def get_name_surface(self) -> pygame.Surface:
+        """Get the rendered username surface"""
+        if Player._font is None:
+            Player._font = pygame.font.Font(None, 20)
         text_color = (255, 255, 255) if self.is_local else (200, 200, 200)
-        text = font.render(self.username, True, text_color)
-        text_rect = text.get_rect(center=(screen_x + self.width//2, screen_y - 10))
-        screen.blit(text, text_rect)
-        
-        # Draw interaction indicator
+        name_key = (self.username, text_color)
+        if name_key != self._name_key:
+            self._name_surface = Player._font.render(self.username, True, text_color)
+            self._name_key = name_key
+        return self._name_surface
+    
+    def draw_primitives(self, screen: pygame.Surface, camera_x: float = 0, camera_y: float = 0, 
+                        alpha: float = 1.0):
+        """Draw the non-blit parts of the player (interaction indicator)"""
         if self.is_interacting:
+            x, y = self.get_render_position(alpha)
+            screen_x = x - camera_x
+            screen_y = y - camera_y
             pygame.draw.circle(screen, (255, 255, 0), 
                              (int(screen_x + self.width//2), int(screen_y + self.height//2)), 
                              30, 3)
     
-    def can_interact_with_task(self, task_x: float, task_y: float, interaction_distance: float = 50) -> bool:
+    def collect_blits(self, camera_x: float = 0, camera_y: float = 0, 
+                      blits: Optional[List[Tuple[pygame.Surface, Any]]] = None, 
+                      alpha: float = 1.0) -> List[Tuple[pygame.Surface, Any]]:
+        """Append (surface, dest) pairs for a batched Surface.blits call to blits and return it"""
+        if blits is None:
+            blits = []
+        
+        # Calculate screen position
+        x, y = self.get_render_position(alpha)
+        screen_x = x - camera_x
+        screen_y = y - camera_y
+        
+        text = self.get_name_surface()
+        text_rect = text.get_rect(center=(screen_x + self.width//2, screen_y - 10))
+        blits.append((self.surface, (screen_x, screen_y)))
+        blits.append((text, text_rect))
+        return blits
+    
+    def draw(self, screen: pygame.Surface, camera_x: float = 0, camera_y: float = 0):
+        """Draw the player"""
+        self.draw_primitives(screen, camera_x, camera_y)
+        screen.blits(self.collect_blits(camera_x, camera_y), doreturn=0)
+    
+    def can_interact_with_task(self, task_x: float, task_y: float, interaction_distance: float = INTERACT_DISTANCE) -> bool:
         """Check if player can interact with a task"""
         dx = self.x + self.width//2 - task_x
         dy = self.y + self.height//2 - task_y
-        distance = (dx*dx + dy*dy) ** 0.5
-        return distance <= interaction_distance
+        return dx*dx + dy*dy <= interaction_distance * interaction_distance
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert player to dictionary for network transmission"""
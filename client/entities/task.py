@@ -3,14 +3,29 @@ Task entity for ChaseHome game
 """
 import pygame
 import math
-import sys
-import os
-from typing import Dict, Any
-# Fix imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from typing import Dict, Any, List, Optional, Tuple
 from client.config import TASK_INCOMPLETE, TASK_COMPLETE, TASK_INTERACTION
 
+# Floating animation: sin(animation_time * 2) * 3 sampled over one period
+_FLOAT_LUT_SIZE = 256
+_FLOAT_LUT = tuple(math.sin(2 * math.pi * i / _FLOAT_LUT_SIZE) * 3 for i in range(_FLOAT_LUT_SIZE))
+_FLOAT_LUT_SCALE = 2 * _FLOAT_LUT_SIZE / (2 * math.pi)
+
 class Task:
+    __slots__ = (
+        "id", "name", "description", "x", "y",
+        "task_type", "steps", "interact_time",
+        "width", "height", "is_completed", "is_being_interacted", "interaction_progress",
+        "animation_time",
+        "_name_surface", "_name_key", "_name_rect", "_name_bg_rect",
+        "_rect", "_progress_bg_rect", "_progress_fill_rect", "surface",
+    )
+    
+    # Shared task name font, created lazily once pygame.font is initialized
+    _font = None
+    # Pre-rendered icon surfaces keyed by (task_type, state, size)
+    _surface_cache: Dict[Tuple[str, str, Tuple[int, int]], pygame.Surface] = {}
+    
     def __init__(self, task_id: str, name: str, description: str, x: float, y: float, 
                  task_type: str = "interact", steps: int = 1, interact_time: float = 3.0):
         self.id = task_id
@@ -32,38 +47,76 @@ class Task:
         # Animation
         self.animation_time = 0.0
         
+        # Cached name text surface, re-rendered only when the name changes
+        self._name_surface = None
+        self._name_key = None
+        
+        # Collision rect, moved in place by get_rect
+        self._rect = pygame.Rect(0, 0, self.width, self.height)
+        
+        # Draw rects, moved in place every frame instead of reallocated
+        self._name_rect: Optional[pygame.Rect] = None
+        self._name_bg_rect: Optional[pygame.Rect] = None
+        self._progress_bg_rect = pygame.Rect(0, 0, 60, 8)
+        self._progress_fill_rect = pygame.Rect(0, 0, 0, 8)
+        
         # Create task surface
         self.update_surface()
     
-    def update_surface(self):
-        """Update the task visual surface"""
-        self.surface = pygame.Surface((self.width, self.height))
+    def get_state(self) -> str:
+        """Get the visual state name (completed, interacting, incomplete)"""
+        if self.is_completed:
+            return "completed"
+        elif self.is_being_interacted:
+            return "interacting"
+        return "incomplete"
+    
+    @classmethod
+    def _get_surface(cls, task_type: str, state: str, size: Tuple[int, int]) -> pygame.Surface:
+        """Get the shared surface for a task type/state, rendering it on first use"""
+        key = (task_type, state, size)
+        surface = cls._surface_cache.get(key)
+        if surface is None:
+            surface = cls._render_surface(task_type, state, size)
+            cls._surface_cache[key] = surface
+        return surface
+    
+    @staticmethod
+    def _render_surface(task_type: str, state: str, size: Tuple[int, int]) -> pygame.Surface:
+        """Render a task icon surface"""
+        width, height = size
+        surface = pygame.Surface(size)
+        try:
+            # Match the display pixel format so blits take SDL's fast path
+            surface = surface.convert()
+        except pygame.error:
+            pass  # No display mode set yet (e.g. headless tests)
         
         # Choose color based on state
-        if self.is_completed:
+        if state == "completed":
             color = TASK_COMPLETE
-        elif self.is_being_interacted:
+        elif state == "interacting":
             color = TASK_INTERACTION
         else:
             color = TASK_INCOMPLETE
         
-        self.surface.fill(color)
+        surface.fill(color)
         
         # Add task type indicator
-        center_x, center_y = self.width // 2, self.height // 2
+        center_x, center_y = width // 2, height // 2
         
-        if self.task_type == "repair":
+        if task_type == "repair":
             # Wrench icon
-            pygame.draw.rect(self.surface, (0, 0, 0), 
+            pygame.draw.rect(surface, (0, 0, 0), 
                            (center_x - 8, center_y - 12, 4, 24))
-            pygame.draw.rect(self.surface, (0, 0, 0), 
+            pygame.draw.rect(surface, (0, 0, 0), 
                            (center_x - 12, center_y - 8, 12, 4))
-        elif self.task_type == "puzzle":
+        elif task_type == "puzzle":
             # Puzzle piece icon
-            pygame.draw.circle(self.surface, (0, 0, 0), (center_x, center_y), 8)
-            pygame.draw.rect(self.surface, color, 
+            pygame.draw.circle(surface, (0, 0, 0), (center_x, center_y), 8)
+            pygame.draw.rect(surface, color, 
                            (center_x - 4, center_y - 12, 8, 8))
-        elif self.task_type == "collect":
+        elif task_type == "collect":
             # Diamond icon
             points = [
                 (center_x, center_y - 10),
@@ -71,18 +124,29 @@ class Task:
                 (center_x, center_y + 10),
                 (center_x + 8, center_y)
             ]
-            pygame.draw.polygon(self.surface, (0, 0, 0), points)
+            pygame.draw.polygon(surface, (0, 0, 0), points)
         else:  # interact
             # Circle icon
-            pygame.draw.circle(self.surface, (0, 0, 0), (center_x, center_y), 8, 2)
+            pygame.draw.circle(surface, (0, 0, 0), (center_x, center_y), 8, 2)
+        
+        # Black icon pixels show the floor through; RLE makes the keyed blit cheap
+        surface.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+        
+        return surface
+    
+    def update_surface(self):
+        """Update the task visual surface"""
+        # Shared read-only surface; only 4 task types x 3 states exist
+        state = self.get_state()
+        self.surface = Task._get_surface(self.task_type, state, (self.width, self.height))
     
     def update(self, dt: float):
-        """Update task state"""
-        self.animation_time += dt
+        """Update task state.
         
-        # Update surface if state changed
-        if self.is_being_interacted or self.is_completed:
-            self.update_surface()
+        Every state change goes through start/stop/complete (or from_dict), which
+        refresh the surface themselves, so only the animation advances here.
+        """
+        self.animation_time += dt
     
     def start_interaction(self):
         """Start task interaction"""
@@ -118,56 +182,87 @@ class Task:
         self.update_surface()
     
     def get_rect(self) -> pygame.Rect:
-        """Get task rectangle for collision detection"""
-        return pygame.Rect(self.x - self.width//2, self.y - self.height//2, 
-                          self.width, self.height)
+        """Get task rectangle for collision detection.
+        
+        The same Rect is reused on every call; copy it if it must outlive the frame.
+        """
+        self._rect.x = int(self.x - self.width//2)
+        self._rect.y = int(self.y - self.height//2)
+        return self._rect
     
-    def draw(self, screen: pygame.Surface, camera_x: float = 0, camera_y: float = 0):
-        """Draw the task"""
-        # Calculate screen position
+    def get_screen_position(self, camera_x: float = 0, camera_y: float = 0) -> Tuple[float, float]:
+        """Get the top-left screen position of the task surface"""
         screen_x = self.x - camera_x - self.width // 2
         screen_y = self.y - camera_y - self.height // 2
         
         # Add floating animation for incomplete tasks
         if not self.is_completed:
-            float_offset = math.sin(self.animation_time * 2) * 3
+            float_offset = _FLOAT_LUT[int(self.animation_time * _FLOAT_LUT_SCALE) & (_FLOAT_LUT_SIZE - 1)]
             screen_y += float_offset
         
-        # Draw task
-        screen.blit(self.surface, (screen_x, screen_y))
+        return screen_x, screen_y
+    
+    def get_name_surface(self) -> pygame.Surface:
+        """Get the rendered task name surface"""
+        if Task._font is None:
+            Task._font = pygame.font.Font(None, 16)
+        text_color = (255, 255, 255)
+        name_key = (self.name, text_color)
+        if name_key != self._name_key:
+            self._name_surface = Task._font.render(self.name, True, text_color)
+            self._name_key = name_key
+            self._name_rect = self._name_surface.get_rect()
+            self._name_bg_rect = self._name_rect.inflate(8, 4)
+        return self._name_surface
+    
+    def draw_primitives(self, screen: pygame.Surface, camera_x: float = 0, camera_y: float = 0):
+        """Draw the non-blit parts of the task (progress bar, name background)"""
+        screen_x, screen_y = self.get_screen_position(camera_x, camera_y)
         
         # Draw interaction progress
         if self.is_being_interacted and self.interaction_progress > 0:
-            progress_width = 60
-            progress_height = 8
-            progress_x = screen_x + self.width//2 - progress_width//2
-            progress_y = screen_y - 20
+            progress_bg = self._progress_bg_rect
+            progress_bg.topleft = (screen_x + self.width//2 - progress_bg.width//2, screen_y - 20)
             
             # Background
-            pygame.draw.rect(screen, (64, 64, 64), 
-                           (progress_x, progress_y, progress_width, progress_height))
+            pygame.draw.rect(screen, (64, 64, 64), progress_bg)
             
             # Progress bar
-            filled_width = int(progress_width * self.interaction_progress)
-            pygame.draw.rect(screen, TASK_INTERACTION, 
-                           (progress_x, progress_y, filled_width, progress_height))
+            progress_fill = self._progress_fill_rect
+            progress_fill.topleft = progress_bg.topleft
+            progress_fill.width = int(progress_bg.width * self.interaction_progress)
+            pygame.draw.rect(screen, TASK_INTERACTION, progress_fill)
             
             # Border
-            pygame.draw.rect(screen, (255, 255, 255), 
-                           (progress_x, progress_y, progress_width, progress_height), 1)
+            pygame.draw.rect(screen, (255, 255, 255), progress_bg, 1)
         
-        # Draw task name when near
+        # Draw task name background when near
         if not self.is_completed:
-            font = pygame.font.Font(None, 16)
-            text = font.render(self.name, True, (255, 255, 255))
-            text_rect = text.get_rect(center=(screen_x + self.width//2, screen_y - 30))
-            
-            # Draw text background
-            bg_rect = text_rect.copy()
-            bg_rect.inflate_ip(8, 4)
-            pygame.draw.rect(screen, (0, 0, 0, 128), bg_rect)
-            
-            screen.blit(text, text_rect)
+            self.get_name_surface()
+            self._name_bg_rect.center = (screen_x + self.width//2, screen_y - 30)
+            pygame.draw.rect(screen, (0, 0, 0, 128), self._name_bg_rect)
+    
+    def collect_blits(self, camera_x: float = 0, camera_y: float = 0, 
+                      blits: Optional[List[Tuple[pygame.Surface, Any]]] = None) -> List[Tuple[pygame.Surface, Any]]:
+        """Append (surface, dest) pairs for a batched Surface.blits call to blits and return it"""
+        if blits is None:
+            blits = []
+        
+        screen_x, screen_y = self.get_screen_position(camera_x, camera_y)
+        blits.append((self.surface, (screen_x, screen_y)))
+        
+        # Task name when near
+        if not self.is_completed:
+            text = self.get_name_surface()
+            self._name_rect.center = (screen_x + self.width//2, screen_y - 30)
+            blits.append((text, self._name_rect))
+        
+        return blits
+    
+    def draw(self, screen: pygame.Surface, camera_x: float = 0, camera_y: float = 0):
+        """Draw the task"""
+        self.draw_primitives(screen, camera_x, camera_y)
+        screen.blits(self.collect_blits(camera_x, camera_y), doreturn=0)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert task to dictionary"""
@@ -0,0 +1,136 @@
+"""
+Task collection for ChaseHome game
+"""
+import math
+from array import array
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from client.config import INTERACT_DISTANCE
+from client.entities.task import Task
+
+class TaskWorld(MutableMapping):
+    """Tasks keyed by id, with task positions also kept in parallel arrays.
+    
+    Visibility queries scan xs/ys directly instead of touching every Task
+    object. Task positions are static once spawned, so they are captured when a
+    task is added. Tasks are also bucketed into a grid of cell_size cells, which
+    proximity lookups use to only visit the tasks in nearby cells.
+    """
+    
+    def __init__(self, cell_size: float = INTERACT_DISTANCE):
+        self.task_list: List[Task] = []
+        self._ids: List[str] = []
+        self.xs = array("d")
+        self.ys = array("d")
+        self._index: Dict[str, int] = {}  # task_id -> position in task_list/xs/ys
+        self.cell_size = cell_size
+        self._grid: Dict[Tuple[int, int], List[Task]] = {}  # cell -> tasks inside it
+    
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        """Get the grid cell containing (x, y)"""
+        return int(x // self.cell_size), int(y // self.cell_size)
+    
+    def _grid_add(self, task: Task):
+        """Put a task into the bucket of its cell"""
+        self._grid.setdefault(self._cell(task.x, task.y), []).append(task)
+    
+    def _grid_remove(self, task: Task):
+        """Take a task out of the bucket of its cell"""
+        cell = self._cell(task.x, task.y)
+        bucket = self._grid[cell]
+        bucket.remove(task)
+        if not bucket:
+            del self._grid[cell]
+    
+    def __getitem__(self, task_id: str) -> Task:
+        return self.task_list[self._index[task_id]]
+    
+    def __setitem__(self, task_id: str, task: Task):
+        index = self._index.get(task_id)
+        if index is None:
+            self._index[task_id] = len(self.task_list)
+            self._ids.append(task_id)
+            self.task_list.append(task)
+            self.xs.append(task.x)
+            self.ys.append(task.y)
+        else:
+            self._grid_remove(self.task_list[index])
+            self.task_list[index] = task
+            self.xs[index] = task.x
+            self.ys[index] = task.y
+        self._grid_add(task)
+    
+    def __delitem__(self, task_id: str):
+        # Swap-remove to keep the arrays dense
+        index = self._index.pop(task_id)
+        self._grid_remove(self.task_list[index])
+        last = len(self.task_list) - 1
+        if index != last:
+            moved_id = self._ids[last]
+            self._ids[index] = moved_id
+            self.task_list[index] = self.task_list[last]
+            self.xs[index] = self.xs[last]
+            self.ys[index] = self.ys[last]
+            self._index[moved_id] = index
+        self._ids.pop()
+        self.task_list.pop()
+        self.xs.pop()
+        self.ys.pop()
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+    
+    def __len__(self) -> int:
+        return len(self.task_list)
+    
+    def __contains__(self, task_id) -> bool:
+        return task_id in self._index
+    
+    def values(self) -> List[Task]:
+        """Get tasks in array order"""
+        return self.task_list
+    
+    def nearest_open_task(self, x: float, y: float, 
+                          max_distance_sq: float = INTERACT_DISTANCE * INTERACT_DISTANCE) -> Optional[Task]:
+        """Get the nearest incomplete task within sqrt(max_distance_sq) of (x, y), if any"""
+        best_task = None
+        best_distance_sq = max_distance_sq
+        
+        # Only cells that can hold a task within reach need to be visited
+        reach = int(math.ceil(math.sqrt(max_distance_sq) / self.cell_size))
+        cell_x, cell_y = self._cell(x, y)
+        grid = self._grid
+        for grid_x in range(cell_x - reach, cell_x + reach + 1):
+            for grid_y in range(cell_y - reach, cell_y + reach + 1):
+                bucket = grid.get((grid_x, grid_y))
+                if not bucket:
+                    continue
+                for task in bucket:
+                    dx = task.x - x
+                    dy = task.y - y
+                    distance_sq = dx*dx + dy*dy
+                    if distance_sq <= best_distance_sq and not task.is_completed:
+                        best_distance_sq = distance_sq
+                        best_task = task
+        
+        return best_task
+    
+    def visible_tasks(self, camera_x: float, camera_y: float, view_width: float, 
+                      view_height: float, margin: float = 0) -> List[Task]:
+        """Get tasks whose position lies within the camera view expanded by margin"""
+        min_x = camera_x - margin
+        max_x = camera_x + view_width + margin
+        min_y = camera_y - margin
+        max_y = camera_y + view_height + margin
+        return [task for task, x, y in zip(self.task_list, self.xs, self.ys)
+                if min_x < x < max_x and min_y < y < max_y]
+    
+    def clear(self):
+        """Remove all tasks"""
+        self.task_list.clear()
+        self._ids.clear()
+        self.xs = array("d")
+        self.ys = array("d")
+        self._index.clear()
+        self._grid.clear()
@@ -3,8 +3,9 @@ Main game class for ChaseHome
 """
 import pygame
 import logging
+import random
 import uuid
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import time
 import sys
 import os
@@ -18,20 +19,52 @@ from client.network import NetworkClient
 from client.ui import GameUI
 from client.entities.player import Player
 from client.entities.task import Task
+from client.entities.task_world import TaskWorld
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Event types let through to the event queue
+HANDLED_EVENTS = [
+    pygame.QUIT,
+    pygame.KEYDOWN,
+    pygame.KEYUP,
+    pygame.MOUSEBUTTONDOWN,
+    pygame.MOUSEBUTTONUP,
+    pygame.WINDOWMINIMIZED,
+    pygame.WINDOWHIDDEN,
+    pygame.WINDOWRESTORED,
+    pygame.WINDOWSHOWN,
+    pygame.WINDOWFOCUSLOST,
+    pygame.WINDOWFOCUSGAINED,
+]
+
+# Squared interaction radius, so nearest-task lookups never need a sqrt
+INTERACT_DISTANCE_SQ = INTERACT_DISTANCE * INTERACT_DISTANCE
+
 class Game:
     def __init__(self):
         pygame.init()
         pygame.mixer.init()
         
         # Screen setup
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.screen = self.create_display()
         pygame.display.set_caption(WINDOW_TITLE)
+        
+        # Only queue the events we handle; mouse hover is polled once per frame by
+        # the UI instead of processing every MOUSEMOTION event
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(HANDLED_EVENTS)
         self.clock = pygame.time.Clock()
         
+        # Unsimulated time carried over to the next frame by the fixed-step loop
+        self.accumulator = 0.0
+        
+        # Window visibility; a hidden window skips drawing and an unfocused one
+        # runs at BACKGROUND_FPS
+        self.render_active = True
+        self.window_focused = True
+        
         # Game state
         self.running = True
         self.game_state = "menu"  # menu, lobby, game
@@ -47,7 +80,8 @@ class Game:
         # Game objects
         self.local_player: Optional[Player] = None
         self.other_players: Dict[str, Player] = {}
-        self.tasks: Dict[str, Task] = {}
+        self.other_players_list: List[Player] = []  # cached values of other_players
+        self.tasks: TaskWorld = TaskWorld()
         self.room_state: Optional[Dict[str, Any]] = None
         
         # Game settings
@@ -56,8 +90,9 @@ class Game:
         self.current_task_interaction: Optional[str] = None
         self.interaction_start_time = 0
         
-        # Input state
-        self.keys_pressed = {}
+        # Position sync
+        self.move_send_timer = 0.0
+        self.last_sent_position: Optional[Tuple[float, float]] = None
         
         # Jumpscare system
         self.jumpscare_active = False
@@ -65,8 +100,47 @@ class Game:
         self.screen_shake_x = 0
         self.screen_shake_y = 0
         
+        # Jumpscare text is static, so render it once
+        self.scare_text = pygame.font.Font(None, 72).render("SCARE!", True, (255, 255, 255)).convert_alpha()
+        self.scare_rect = self.scare_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+        
+        # Full-window red flash, reused with a per-frame surface alpha
+        self.flash_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        self.flash_surface.fill((255, 0, 0))
+        
+        # Screen layout of the previous frame, to detect when a full flip is needed
+        self.last_frame_key = None
+        
+        # Pre-rendered floor grid, one cell larger than the window so it can scroll
+        self.grid_size = 64
+        self.grid_surface = self.create_grid_surface(self.grid_size)
+        
         logger.info(f"Game initialized with user ID: {self.user_id}")
     
+    def create_display(self) -> pygame.Surface:
+        """Open the window as a plain window surface.
+        
+        SCALED (and the vsync that needs it) would render through an SDL renderer,
+        where display.update(rects) becomes a full flip and the menu's dirty-rect
+        updates are lost. Frame pacing is left to the clock instead.
+        """
+        return pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    
+    def create_grid_surface(self, grid_size: int) -> pygame.Surface:
+        """Render the background floor grid once"""
+        width = WINDOW_WIDTH + grid_size
+        height = WINDOW_HEIGHT + grid_size
+        surface = pygame.Surface((width, height)).convert()
+        surface.fill((32, 32, 32))
+        
+        for x in range(0, width, grid_size):
+            pygame.draw.line(surface, (48, 48, 48), (x, 0), (x, height))
+        
+        for y in range(0, height, grid_size):
+            pygame.draw.line(surface, (48, 48, 48), (0, y), (width, y))
+        
+        return surface
+    
     def setup_network_handlers(self):
         """Set up network message handlers"""
         self.network.add_message_handler("room_created", self.on_room_created)
@@ -74,18 +148,33 @@ class Game:
         self.network.add_message_handler("player_joined", self.on_player_joined)
         self.network.add_message_handler("player_left", self.on_player_left)
         self.network.add_message_handler("player_moved", self.on_player_moved)
+        self.network.add_message_handler("positions", self.on_positions)
         self.network.add_message_handler("task_completed", self.on_task_completed)
         self.network.add_message_handler("floor_complete", self.on_floor_complete)
         self.network.add_message_handler("error", self.on_error)
     
     def run(self):
-        """Main game loop"""
+        """Main game loop.
+        
+        Simulation advances in fixed FIXED_DT steps so timers and movement do not
+        drift with the frame rate; rendering runs once per frame and interpolates
+        player positions by the leftover fraction of a step.
+        """
         while self.running:
-            dt = self.clock.tick(FPS) / 1000.0  # Delta time in seconds
+            # Delta time in seconds, capped so a long stall cannot queue endless steps.
+            # The simulation keeps running in the background at a lower frame rate.
+            fps = FPS if self.window_focused and self.render_active else BACKGROUND_FPS
+            frame_time = min(self.clock.tick(fps) / 1000.0, MAX_FRAME_TIME)
             
             self.handle_events()
-            self.update(dt)
-            self.draw()
+            
+            self.accumulator += frame_time
+            while self.accumulator >= FIXED_DT:
+                self.update(FIXED_DT)
+                self.accumulator -= FIXED_DT
+            
+            if self.render_active:
+                self.draw(self.accumulator / FIXED_DT)
     
     def handle_events(self):
         """Handle pygame events"""
@@ -93,10 +182,21 @@ class Game:
             if event.type == pygame.QUIT:
                 self.running = False
             
+            elif event.type in (pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN):
+                self.render_active = False
+            
+            elif event.type in (pygame.WINDOWRESTORED, pygame.WINDOWSHOWN):
+                self.render_active = True
+                self.last_frame_key = None  # Force a full flip of the restored window
+            
+            elif event.type == pygame.WINDOWFOCUSLOST:
+                self.window_focused = False
+            
+            elif event.type == pygame.WINDOWFOCUSGAINED:
+                self.window_focused = True
+            
             elif event.type == pygame.KEYDOWN:
-                self.keys_pressed[event.key] = True
-                
-                # Handle specific game inputs
+                # One-shot game inputs; movement is polled via pygame.key.get_pressed()
                 if event.key == pygame.K_e and self.game_state == "game":
                     self.handle_interact()
                 elif event.key == pygame.K_ESCAPE:
@@ -105,9 +205,6 @@ class Game:
                         self.game_state = "menu"
             
             elif event.type == pygame.KEYUP:
-                if event.key in self.keys_pressed:
-                    del self.keys_pressed[event.key]
-                
                 # Stop interaction on key release
                 if event.key == pygame.K_e and self.current_task_interaction:
                     self.stop_task_interaction()
@@ -132,6 +229,9 @@ class Game:
     
     def update(self, dt: float):
         """Update game state"""
+        # Apply messages received since the last step
+        self.network.process_messages()
+        
         # Update UI
         self.ui.update(dt)
         
@@ -147,24 +247,26 @@ class Game:
         """Update game-specific logic"""
         # Update local player
         if self.local_player:
-            old_x, old_y = self.local_player.x, self.local_player.y
-            self.local_player.update(dt, self.keys_pressed)
+            self.local_player.update(dt, pygame.key.get_pressed())
             
-            # Send position update if player moved
-            if (self.local_player.x != old_x or self.local_player.y != old_y):
-                self.network.send_player_move(self.local_player.x, self.local_player.y)
+            # Send position updates at a fixed rate, and only if the player moved
+            self.move_send_timer += dt
+            if self.move_send_timer >= MOVE_SEND_INTERVAL:
+                self.move_send_timer = 0.0
+                self.send_position_if_moved()
             
             # Update camera to follow player
             self.camera_x = self.local_player.x - WINDOW_WIDTH // 2
             self.camera_y = self.local_player.y - WINDOW_HEIGHT // 2
         
-        # Update other players
-        for player in self.other_players.values():
+        # Update other players (interpolate toward network positions)
+        for player in self.other_players_list:
             player.update(dt)
         
-        # Update tasks
-        for task in self.tasks.values():
-            task.update(dt)
+        # Update tasks; completed tasks no longer animate or change state
+        for task in self.tasks.task_list:
+            if not task.is_completed:
+                task.update(dt)
         
         # Update task interaction
         if self.current_task_interaction:
@@ -174,6 +276,18 @@ class Game:
                 self.network.complete_task(task.id)
                 self.stop_task_interaction()
     
+    def send_position_if_moved(self):
+        """Send the local player position if it changed since the last send"""
+        x, y = self.local_player.x, self.local_player.y
+        if self.last_sent_position is not None:
+            dx = x - self.last_sent_position[0]
+            dy = y - self.last_sent_position[1]
+            if dx*dx + dy*dy < MOVE_SEND_EPSILON * MOVE_SEND_EPSILON:
+                return
+        
+        if self.network.send_player_move(x, y):
+            self.last_sent_position = (x, y)
+    
     def update_jumpscare(self, dt: float):
         """Update jumpscare effects"""
         self.jumpscare_timer -= dt
@@ -184,12 +298,12 @@ class Game:
             self.screen_shake_y = 0
         else:
             # Screen shake effect
-            import random
-            self.screen_shake_x = random.randint(-SCREEN_SHAKE_INTENSITY, SCREEN_SHAKE_INTENSITY)
-            self.screen_shake_y = random.randint(-SCREEN_SHAKE_INTENSITY, SCREEN_SHAKE_INTENSITY)
+            randint = random.randint
+            self.screen_shake_x = randint(-SCREEN_SHAKE_INTENSITY, SCREEN_SHAKE_INTENSITY)
+            self.screen_shake_y = randint(-SCREEN_SHAKE_INTENSITY, SCREEN_SHAKE_INTENSITY)
     
-    def draw(self):
-        """Draw everything"""
+    def draw(self, alpha: float = 1.0):
+        """Draw everything, with entities interpolated alpha of the way into the current step"""
         # Clear screen
         self.screen.fill(BLACK)
         
@@ -198,83 +312,89 @@ class Game:
         shake_offset_y = self.screen_shake_y if self.jumpscare_active else 0
         
         if self.game_state == "game":
-            self.draw_game(shake_offset_x, shake_offset_y)
+            self.draw_game(shake_offset_x, shake_offset_y, alpha)
         
         # Draw UI
-        self.ui.draw(self.screen)
+        dirty_rects = self.ui.draw(self.screen)
         
         # Draw jumpscare overlay
         if self.jumpscare_active:
             self.draw_jumpscare_overlay()
         
-        pygame.display.flip()
+        # The game world scrolls and jumpscares cover the window, so those need a full
+        # flip, as does the first frame after any screen change. Static menu/lobby
+        # frames only push the UI areas that changed.
+        frame_key = (self.game_state, self.ui.current_screen, self.jumpscare_active)
+        if self.game_state == "game" or self.jumpscare_active or frame_key != self.last_frame_key:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty_rects)
+        self.last_frame_key = frame_key
     
-    def draw_game(self, shake_x: float = 0, shake_y: float = 0):
+    def draw_game(self, shake_x: float = 0, shake_y: float = 0, alpha: float = 1.0):
         """Draw game world"""
-        # Draw background
-        self.screen.fill((32, 32, 32))
-        
-        # Draw simple floor grid
-        grid_size = 64
-        start_x = int(-self.camera_x - shake_x) % grid_size
-        start_y = int(-self.camera_y - shake_y) % grid_size
-        
-        for x in range(start_x, WINDOW_WIDTH + grid_size, grid_size):
-            pygame.draw.line(self.screen, (48, 48, 48), (x, 0), (x, WINDOW_HEIGHT))
-        
-        for y in range(start_y, WINDOW_HEIGHT + grid_size, grid_size):
-            pygame.draw.line(self.screen, (48, 48, 48), (0, y), (WINDOW_WIDTH, y))
-        
-        # Draw tasks
-        for task in self.tasks.values():
-            task.draw(self.screen, self.camera_x + shake_x, self.camera_y + shake_y)
-        
-        # Draw other players
-        for player in self.other_players.values():
-            player.draw(self.screen, self.camera_x + shake_x, self.camera_y + shake_y)
-        
-        # Draw local player
+        screen = self.screen
+        camera_x = self.camera_x
+        camera_y = self.camera_y
+        if self.local_player:
+            # Follow the interpolated player so the camera moves as smoothly as it does
+            render_x, render_y = self.local_player.get_render_position(alpha)
+            camera_x = render_x - WINDOW_WIDTH // 2
+            camera_y = render_y - WINDOW_HEIGHT // 2
+        camera_x += shake_x
+        camera_y += shake_y
+        
+        # Draw background and simple floor grid, scrolled with the camera
+        grid_size = self.grid_size
+        start_x = int(-camera_x) % grid_size
+        start_y = int(-camera_y) % grid_size
+        screen.blit(self.grid_surface, (start_x - grid_size, start_y - grid_size))
+        
+        # Collect on-screen entities in draw order: tasks, other players, local player.
+        # The margin keeps name labels and progress bars of edge entities visible.
+        cfg = CFG
+        width, height, margin = cfg.WINDOW_WIDTH, cfg.WINDOW_HEIGHT, cfg.ENTITY_CULL_MARGIN
+        tasks = self.tasks.visible_tasks(camera_x, camera_y, width, height, margin)
+        players = [player for player in self.other_players_list
+                   if camera_x - margin < player.x < camera_x + width + margin and
+                   camera_y - margin < player.y < camera_y + height + margin]
         if self.local_player:
-            self.local_player.draw(self.screen, self.camera_x + shake_x, self.camera_y + shake_y)
+            players.append(self.local_player)
+        
+        # Draw shapes first, then issue all sprite/text blits in a single call.
+        # Tasks are static; players are drawn at their interpolated positions.
+        blits = []
+        for task in tasks:
+            task.draw_primitives(screen, camera_x, camera_y)
+            task.collect_blits(camera_x, camera_y, blits)
+        for player in players:
+            player.draw_primitives(screen, camera_x, camera_y, alpha)
+            player.collect_blits(camera_x, camera_y, blits, alpha)
+        
+        screen.blits(blits, doreturn=0)
     
     def draw_jumpscare_overlay(self):
         """Draw jumpscare visual effects"""
         # Flash red overlay
         flash_intensity = int(128 * (self.jumpscare_timer / JUMPSCARE_DURATION))
         if flash_intensity > 0:
-            flash_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-            flash_surface.fill((255, 0, 0))
-            flash_surface.set_alpha(flash_intensity)
-            self.screen.blit(flash_surface, (0, 0))
+            self.flash_surface.set_alpha(flash_intensity)
+            self.screen.blit(self.flash_surface, (0, 0))
         
         # Draw "SCARE!" text
         if self.jumpscare_timer > JUMPSCARE_DURATION * 0.5:
-            font = pygame.font.Font(None, 72)
-            text = font.render("SCARE!", True, (255, 255, 255))
-            text_rect = text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
-            self.screen.blit(text, text_rect)
+            self.screen.blit(self.scare_text, self.scare_rect)
     
     def handle_interact(self):
         """Handle interaction key press"""
         if not self.local_player:
             return
         
-        # Find nearest task
-        nearest_task = None
-        nearest_distance = float('inf')
-        
-        for task in self.tasks.values():
-            if task.is_completed:
-                continue
-            
-            if self.local_player.can_interact_with_task(task.x, task.y):
-                dx = self.local_player.x - task.x
-                dy = self.local_player.y - task.y
-                distance = (dx*dx + dy*dy) ** 0.5
-                
-                if distance < nearest_distance:
-                    nearest_distance = distance
-                    nearest_task = task
+        # Find nearest task in reach of the player's center
+        player = self.local_player
+        nearest_task = self.tasks.nearest_open_task(player.x + player.width//2, 
+                                                    player.y + player.height//2, 
+                                                    INTERACT_DISTANCE_SQ)
         
         # Start interaction with nearest task
         if nearest_task and not self.current_task_interaction:
@@ -351,6 +471,7 @@ class Game:
         # Reset game state
         self.local_player = None
         self.other_players.clear()
+        self.refresh_player_list()
         self.tasks.clear()
         self.room_state = None
     
@@ -365,6 +486,7 @@ class Game:
             for player_data in self.room_state.get('players', []):
                 if player_data.get('uid') == self.user_id:
                     self.local_player = Player.from_dict(player_data, is_local=True)
+                    self.last_sent_position = (self.local_player.x, self.local_player.y)
                     break
             
             # Create other players
@@ -372,12 +494,17 @@ class Game:
             for player_data in self.room_state.get('players', []):
                 if player_data.get('uid') != self.user_id:
                     self.other_players[player_data['uid']] = Player.from_dict(player_data)
+            self.refresh_player_list()
             
             # Create tasks
             self.tasks.clear()
             for task_data in self.room_state.get('active_tasks', []):
                 self.tasks[task_data['id']] = Task.from_dict(task_data)
     
+    def refresh_player_list(self):
+        """Rebuild the cached other player list after other_players changes"""
+        self.other_players_list = list(self.other_players.values())
+    
     def show_menu(self):
         """Show main menu"""
         self.leave_room()
@@ -421,16 +548,26 @@ class Game:
         user_id = data.get('user_id')
         if user_id in self.other_players:
             del self.other_players[user_id]
+            self.refresh_player_list()
         logger.info(f"Player left: {data}")
     
     def on_player_moved(self, data: Dict[str, Any]):
         """Handle player movement"""
-        user_id = data.get('user_id')
-        x = data.get('x', 0)
-        y = data.get('y', 0)
+        player = self.other_players.get(data.get('user_id'))
+        if player is None:
+            return  # Unknown or local player
         
-        if user_id in self.other_players:
-            self.other_players[user_id].set_position(x, y)
+        # Keep the current target for any missing coordinate rather than jumping to 0
+        player.set_target_position(data.get('x', player.target_x), data.get('y', player.target_y))
+    
+    def on_positions(self, data: Dict[str, Any]):
+        """Handle a batch of player positions, keyed by user id"""
+        for user_id, position in data.items():
+            player = self.other_players.get(user_id)
+            if player is None:
+                continue  # Unknown or local player
+            
+            player.set_target_position(position.get('x', player.target_x), position.get('y', player.target_y))
     
     def on_task_completed(self, data: Dict[str, Any]):
         """Handle task completion"""
@@ -441,7 +578,6 @@ class Game:
             self.tasks[task_id].complete_task()
         
         # Random chance for jumpscare after task completion
-        import random
         if random.random() < 0.1:  # 10% chance
             self.trigger_jumpscare()
         
@@ -4,9 +4,10 @@ Network client for ChaseHome game WebSocket communication
 import asyncio
 import json
 import logging
+import queue
 import websocket
 import threading
-from typing import Optional, Callable, Dict, Any
+from typing import Optional, Callable, Dict, Any, Tuple
 import time
 import sys
 import os
@@ -17,6 +18,25 @@ sys.path.insert(0, project_root)
 
 logger = logging.getLogger(__name__)
 
+# orjson is an optional, much faster JSON codec; fall back to the stdlib if missing
+try:
+    import orjson
+    
+    def json_dumps(message: Dict[str, Any]) -> str:
+        return orjson.dumps(message).decode()
+    
+    json_loads = orjson.loads
+except ImportError:
+    json_dumps = json.dumps
+    json_loads = json.loads
+
+# Positions are sent in half-pixel units; after the first absolute position,
+# moves are sent as integer deltas from the last sent position
+POSITION_SCALE = 2
+# Every this many moves the absolute position is sent again, so a delta the server
+# dropped (e.g. one that arrived before the join was processed) is corrected
+POSITION_KEYFRAME_INTERVAL = 20
+
 class NetworkClient:
     def __init__(self, server_url: str):
         self.server_url = server_url
@@ -26,15 +46,23 @@ class NetworkClient:
         self.message_handlers: Dict[str, Callable] = {}
         self.connection_thread: Optional[threading.Thread] = None
         self.should_reconnect = True
+        self._last_sent_position: Optional[Tuple[int, int]] = None  # quantized
+        self._moves_since_keyframe = 0
+        self._connected_event = threading.Event()  # set while the socket is open
+        # Decoded (event, payload) pairs from the network thread, dispatched on the
+        # main thread by process_messages
+        self._inbox: queue.SimpleQueue = queue.SimpleQueue()
         
     def add_message_handler(self, event: str, handler: Callable):
         """Add a handler for specific message types"""
         self.message_handlers[event] = handler
     
-    def connect(self, user_id: str) -> bool:
-        """Connect to the WebSocket server"""
+    def connect(self, user_id: str, timeout: float = 3.0) -> bool:
+        """Connect to the WebSocket server, waiting up to timeout seconds for the handshake"""
         try:
             self.user_id = user_id
+            self._last_sent_position = None
+            self._connected_event.clear()
             ws_url = f"{self.server_url}/ws/{user_id}"
             
             self.ws = websocket.WebSocketApp(
@@ -52,8 +80,8 @@ class NetworkClient:
             )
             self.connection_thread.start()
             
-            # Wait a bit for connection
-            time.sleep(1)
+            # Return as soon as the connection opens (or fails / times out)
+            self._connected_event.wait(timeout)
             return self.is_connected
             
         except Exception as e:
@@ -78,7 +106,7 @@ class NetworkClient:
                 "event": event,
                 "data": data or {}
             }
-            self.ws.send(json.dumps(message))
+            self.ws.send(json_dumps(message))
             return True
         except Exception as e:
             logger.error(f"Failed to send message: {e}")
@@ -87,28 +115,43 @@ class NetworkClient:
     def _on_open(self, ws):
         """Handle WebSocket connection opened"""
         self.is_connected = True
+        self._connected_event.set()
         logger.info("Connected to server")
     
     def _on_message(self, ws, message):
-        """Handle incoming WebSocket messages"""
+        """Decode an incoming WebSocket message and queue it for the main thread"""
         try:
-            data = json.loads(message)
-            event = data.get("event")
-            payload = data.get("data", {})
+            data = json_loads(message)
+            self._inbox.put((data.get("event"), data.get("data", {})))
+        except Exception as e:
+            logger.error(f"Failed to decode message: {e}")
+    
+    def process_messages(self):
+        """Dispatch queued messages to their handlers; call from the main thread"""
+        inbox = self._inbox
+        handlers = self.message_handlers
+        while True:
+            try:
+                event, payload = inbox.get_nowait()
+            except queue.Empty:
+                return
             
             # Call appropriate handler
-            if event in self.message_handlers:
-                self.message_handlers[event](payload)
-            else:
+            handler = handlers.get(event)
+            if handler is None:
                 logger.warning(f"No handler for event: {event}")
-                
-        except Exception as e:
-            logger.error(f"Failed to handle message: {e}")
+                continue
+            
+            try:
+                handler(payload)
+            except Exception as e:
+                logger.error(f"Failed to handle message: {e}")
     
     def _on_error(self, ws, error):
         """Handle WebSocket errors"""
         logger.error(f"WebSocket error: {error}")
         self.is_connected = False
+        self._connected_event.set()  # Wake a pending connect() so it can fail fast
     
     def _on_close(self, ws, close_status_code, close_msg):
         """Handle WebSocket connection closed"""
@@ -125,6 +168,7 @@ class NetworkClient:
     # Game-specific message methods
     def create_room(self, room_name: str, username: str) -> bool:
         """Create a new room"""
+        self._last_sent_position = None
         return self.send_message("create_room", {
             "room_name": room_name,
             "username": username
@@ -132,6 +176,7 @@ class NetworkClient:
     
     def join_room(self, room_id: str, username: str) -> bool:
         """Join an existing room"""
+        self._last_sent_position = None
         return self.send_message("join_room", {
             "room_id": room_id,
             "username": username
@@ -143,10 +188,25 @@ class NetworkClient:
     
     def send_player_move(self, x: float, y: float) -> bool:
         """Send player position update"""
-        return self.send_message("player_move", {
-            "x": x,
-            "y": y
-        })
+        qx = round(x * POSITION_SCALE)
+        qy = round(y * POSITION_SCALE)
+        last = self._last_sent_position
+        
+        if last is None or self._moves_since_keyframe >= POSITION_KEYFRAME_INTERVAL:
+            # First move in a room, or a periodic keyframe: send the absolute position as a base
+            data = {"x": qx / POSITION_SCALE, "y": qy / POSITION_SCALE}
+        else:
+            dx = qx - last[0]
+            dy = qy - last[1]
+            if not dx and not dy:
+                return True  # Nothing to send at this resolution
+            data = {"dx": dx, "dy": dy}
+        
+        success = self.send_message("player_move", data)
+        if success:
+            self._last_sent_position = (qx, qy)
+            self._moves_since_keyframe = 0 if "x" in data else self._moves_since_keyframe + 1
+        return success
     
     def complete_task(self, task_id: str) -> bool:
         """Mark a task as completed"""
@@ -2,7 +2,7 @@
 UI system for ChaseHome game
 """
 import pygame
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Tuple
 import sys
 import os
 
@@ -12,16 +12,73 @@ sys.path.insert(0, project_root)
 
 from client.config import *
 
+# Rendered text surfaces keyed by (font, text, color). The font object itself is
+# part of the key so a freed font's id can never alias a live one.
+_TEXT_CACHE: Dict[tuple, pygame.Surface] = {}
+_TEXT_CACHE_LIMIT = 256  # entries kept before the cache is flushed
+
+# Row status prefixes for the in-game task and player lists
+TASK_DONE_PREFIX = "✓ "
+TASK_OPEN_PREFIX = "○ "
+PLAYER_ONLINE_PREFIX = "● "
+PLAYER_OFFLINE_PREFIX = "○ "
+
+# Shared default-font instances keyed by point size
+_FONT_CACHE: Dict[int, pygame.font.Font] = {}
+
+def get_font(size: int) -> pygame.font.Font:
+    """Get the shared default font for a size, creating it on first use"""
+    font = _FONT_CACHE.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _FONT_CACHE[size] = pygame.font.Font(None, size)
+    return font
+
+def render_cached(font: pygame.font.Font, text: str, color) -> pygame.Surface:
+    """Render antialiased text, reusing the surface from earlier identical calls"""
+    key = (font, text, color)
+    surface = _TEXT_CACHE.get(key)
+    if surface is None:
+        if len(_TEXT_CACHE) >= _TEXT_CACHE_LIMIT:
+            # Drop everything; labels still in use are re-rendered on their next draw
+            _TEXT_CACHE.clear()
+        surface = font.render(text, True, color)
+        try:
+            # Match the display pixel format so the cached surface blits on SDL's fast path
+            surface = surface.convert_alpha()
+        except pygame.error:
+            pass  # No display mode set yet (e.g. headless tests)
+        _TEXT_CACHE[key] = surface
+    return surface
+
+def new_ui_surface(size: Tuple[int, int]) -> pygame.Surface:
+    """Create an opaque surface in the display pixel format, when a display exists"""
+    surface = pygame.Surface(size)
+    try:
+        return surface.convert()
+    except pygame.error:
+        return surface  # No display mode set yet (e.g. headless tests)
+
 class Button:
+    # Event types handle_event reacts to
+    HANDLED_EVENTS = frozenset((pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP))
+    
+    # Background color by state index: 0 normal, 1 hovered, 2 pressed
+    _STATE_COLORS = (UI_BUTTON, UI_BUTTON_HOVER, UI_BUTTON_ACTIVE)
+    
     def __init__(self, x: int, y: int, width: int, height: int, text: str, 
                  callback: Optional[Callable] = None, font_size: int = 24):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
         self.callback = callback
-        self.font = pygame.font.Font(None, font_size)
+        self.font = get_font(font_size)
         self.is_hovered = False
         self.is_pressed = False
         
+        # Pre-rendered background + border + label keyed by (color, text, size)
+        self._chrome: Dict[tuple, pygame.Surface] = {}
+        
     def handle_event(self, event: pygame.event.Event) -> bool:
         """Handle mouse events. Returns True if button was clicked."""
         if event.type == pygame.MOUSEMOTION:
@@ -42,35 +99,59 @@ class Button:
         
         return False
     
+    def update(self, dt: float):
+        """Poll hover state (MOUSEMOTION events are not queued)"""
+        self.is_hovered = self.rect.collidepoint(pygame.mouse.get_pos())
+    
+    def get_draw_state(self) -> tuple:
+        """Get everything that affects how the button looks"""
+        return (self.is_pressed, self.is_hovered, self.text, tuple(self.rect))
+    
+    def get_chrome(self) -> pygame.Surface:
+        """Get the button surface for its current state, rendering it on first use"""
+        # Choose color based on state; pressed wins over hovered
+        color = Button._STATE_COLORS[2 if self.is_pressed else int(self.is_hovered)]
+        
+        key = (color, self.text, self.rect.size)
+        surface = self._chrome.get(key)
+        if surface is None:
+            surface = new_ui_surface(self.rect.size)
+            local_rect = surface.get_rect()
+            surface.fill(color)
+            pygame.draw.rect(surface, UI_TEXT, local_rect, 2)
+            text_surface = render_cached(self.font, self.text, UI_TEXT)
+            surface.blit(text_surface, text_surface.get_rect(center=local_rect.center))
+            self._chrome[key] = surface
+        return surface
+    
+    def draw_primitives(self, screen: pygame.Surface):
+        """Nothing to draw; the background and border are part of the pre-rendered chrome"""
+    
+    def collect_blits(self, blits: Optional[List[Tuple[pygame.Surface, Any]]] = None) -> List[Tuple[pygame.Surface, Any]]:
+        """Append the button (surface, dest) pair for a batched Surface.blits call and return blits"""
+        if blits is None:
+            blits = []
+        blits.append((self.get_chrome(), self.rect))
+        return blits
+    
     def draw(self, screen: pygame.Surface):
         """Draw the button"""
-        # Choose color based on state
-        if self.is_pressed:
-            color = UI_BUTTON_ACTIVE
-        elif self.is_hovered:
-            color = UI_BUTTON_HOVER
-        else:
-            color = UI_BUTTON
-        
-        # Draw button background
-        pygame.draw.rect(screen, color, self.rect)
-        pygame.draw.rect(screen, UI_TEXT, self.rect, 2)
-        
-        # Draw text
-        text_surface = self.font.render(self.text, True, UI_TEXT)
-        text_rect = text_surface.get_rect(center=self.rect.center)
-        screen.blit(text_surface, text_rect)
+        self.draw_primitives(screen)
+        screen.blits(self.collect_blits(), doreturn=0)
 
 class TextInput:
+    # Event types handle_event reacts to
+    HANDLED_EVENTS = frozenset((pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN))
+    
     def __init__(self, x: int, y: int, width: int, height: int, placeholder: str = "", 
                  max_length: int = 50, font_size: int = 24):
         self.rect = pygame.Rect(x, y, width, height)
         self.placeholder = placeholder
         self.max_length = max_length
-        self.font = pygame.font.Font(None, font_size)
+        self.font = get_font(font_size)
         self.text = ""
         self.is_focused = False
-        self.cursor_time = 0
+        self.blink_frames = 0  # update steps into the cursor blink cycle, wraps at 64
         
     def handle_event(self, event: pygame.event.Event) -> bool:
         """Handle input events. Returns True if enter was pressed."""
@@ -88,49 +169,97 @@ class TextInput:
         return False
     
     def update(self, dt: float):
-        """Update cursor animation"""
-        self.cursor_time += dt
+        """Update cursor animation; updates run at the fixed simulation rate"""
+        self.blink_frames = (self.blink_frames + 1) & 0x3F
     
-    def draw(self, screen: pygame.Surface):
-        """Draw the text input"""
-        # Draw background
-        color = UI_BUTTON_HOVER if self.is_focused else UI_BUTTON
-        pygame.draw.rect(screen, color, self.rect)
-        pygame.draw.rect(screen, UI_TEXT, self.rect, 2)
-        
-        # Draw text or placeholder
+    def is_cursor_visible(self) -> bool:
+        """Check whether the blinking cursor is in its visible phase"""
+        return self.is_focused and self.blink_frames < 32
+    
+    def get_draw_state(self) -> tuple:
+        """Get everything that affects how the input looks"""
+        return (self.text, self.is_focused, self.is_cursor_visible(), tuple(self.rect))
+    
+    def get_text_blit(self) -> Tuple[pygame.Surface, pygame.Rect]:
+        """Get the (surface, rect) of the text or placeholder"""
         display_text = self.text if self.text else self.placeholder
         text_color = UI_TEXT if self.text else UI_TEXT_DISABLED
         
-        text_surface = self.font.render(display_text, True, text_color)
-        text_rect = text_surface.get_rect(midleft=(self.rect.x + 10, self.rect.centery))
-        screen.blit(text_surface, text_rect)
+        text_surface = render_cached(self.font, display_text, text_color)
+        return text_surface, text_surface.get_rect(midleft=(self.rect.x + 10, self.rect.centery))
+    
+    def draw_primitives(self, screen: pygame.Surface):
+        """Draw the background, border and cursor"""
+        color = UI_BUTTON_HOVER if self.is_focused else UI_BUTTON
+        pygame.draw.rect(screen, color, self.rect)
+        pygame.draw.rect(screen, UI_TEXT, self.rect, 2)
         
         # Draw cursor
-        if self.is_focused and self.cursor_time % 1 < 0.5:
-            cursor_x = text_rect.right + 2 if self.text else self.rect.x + 10
+        if self.is_cursor_visible():
+            cursor_x = self.get_text_blit()[1].right + 2 if self.text else self.rect.x + 10
             pygame.draw.line(screen, UI_TEXT, 
                            (cursor_x, self.rect.y + 5), 
                            (cursor_x, self.rect.bottom - 5), 2)
+    
+    def collect_blits(self, blits: Optional[List[Tuple[pygame.Surface, Any]]] = None) -> List[Tuple[pygame.Surface, Any]]:
+        """Append the text (surface, dest) pair for a batched Surface.blits call and return blits"""
+        if blits is None:
+            blits = []
+        blits.append(self.get_text_blit())
+        return blits
+    
+    def draw(self, screen: pygame.Surface):
+        """Draw the text input"""
+        self.draw_primitives(screen)
+        screen.blits(self.collect_blits(), doreturn=0)
 
 class Panel:
+    # Panels are display-only
+    HANDLED_EVENTS = frozenset()
+    
     def __init__(self, x: int, y: int, width: int, height: int, title: str = ""):
         self.rect = pygame.Rect(x, y, width, height)
         self.title = title
-        self.font = pygame.font.Font(None, 32)
-        self.content_font = pygame.font.Font(None, 24)
+        self.font = get_font(32)
+        self.content_font = get_font(24)
         
+        # Pre-rendered background + border + title, rebuilt if title or size change
+        self._chrome: Optional[pygame.Surface] = None
+        self._chrome_key = None
+        
+    def get_draw_state(self) -> tuple:
+        """Get everything that affects how the panel looks"""
+        return (self.title, tuple(self.rect))
+    
+    def get_chrome(self) -> pygame.Surface:
+        """Get the panel surface, rendering it on first use"""
+        key = (self.title, self.rect.size)
+        if key != self._chrome_key:
+            surface = new_ui_surface(self.rect.size)
+            local_rect = surface.get_rect()
+            surface.fill(UI_PANEL)
+            pygame.draw.rect(surface, UI_TEXT, local_rect, 2)
+            if self.title:
+                title_surface = render_cached(self.font, self.title, UI_TEXT)
+                surface.blit(title_surface, title_surface.get_rect(midtop=(local_rect.centerx, 10)))
+            self._chrome = surface
+            self._chrome_key = key
+        return self._chrome
+    
+    def draw_primitives(self, screen: pygame.Surface):
+        """Nothing to draw; the background and border are part of the pre-rendered chrome"""
+    
+    def collect_blits(self, blits: Optional[List[Tuple[pygame.Surface, Any]]] = None) -> List[Tuple[pygame.Surface, Any]]:
+        """Append the panel (surface, dest) pair for a batched Surface.blits call and return blits"""
+        if blits is None:
+            blits = []
+        blits.append((self.get_chrome(), self.rect))
+        return blits
+    
     def draw(self, screen: pygame.Surface):
         """Draw the panel background"""
-        # Draw panel background
-        pygame.draw.rect(screen, UI_PANEL, self.rect)
-        pygame.draw.rect(screen, UI_TEXT, self.rect, 2)
-        
-        # Draw title
-        if self.title:
-            title_surface = self.font.render(self.title, True, UI_TEXT)
-            title_rect = title_surface.get_rect(midtop=(self.rect.centerx, self.rect.y + 10))
-            screen.blit(title_surface, title_rect)
+        self.draw_primitives(screen)
+        screen.blits(self.collect_blits(), doreturn=0)
 
 class GameUI:
     def __init__(self, screen_width: int, screen_height: int):
@@ -149,10 +278,35 @@ class GameUI:
         self.create_lobby_ui()
         self.create_game_ui()
         
+        # Per screen, the elements that react to each event type, in element order
+        self.event_dispatch: Dict[str, Dict[int, List]] = {}
+        for name, elements in self.elements.items():
+            dispatch = self.event_dispatch[name] = {}
+            for element in elements:
+                for event_type in element.HANDLED_EVENTS:
+                    dispatch.setdefault(event_type, []).append(element)
+        
+        # Bounding rect of each screen's elements, for pointer early-outs
+        self.screen_bounds: Dict[str, pygame.Rect] = {
+            name: elements[0].rect.unionall([element.rect for element in elements[1:]])
+            for name, elements in self.elements.items() if elements
+        }
+        
         # Game state for UI
         self.room_state: Optional[Dict[str, Any]] = None
         self.player_name = "Player"
         
+        # What each element and the screen content looked like when last drawn,
+        # so draw() can report only the areas that changed
+        self._drawn_states: Dict[Any, tuple] = {}
+        self._drawn_room_state: Optional[Dict[str, Any]] = None
+        
+        # Content blits built for (screen, room state); room state is only ever
+        # replaced, never mutated, so identity tells when to rebuild
+        self._content_blits: List[Tuple[pygame.Surface, Any]] = []
+        self._content_screen: Optional[str] = None
+        self._content_room_state: Optional[Dict[str, Any]] = None
+        
     def create_menu_ui(self):
         """Create main menu UI elements"""
         center_x = self.screen_width // 2
@@ -233,9 +387,10 @@ class GameUI:
     
     def handle_event(self, event: pygame.event.Event) -> Optional[str]:
         """Handle UI events. Returns action if any."""
-        current_elements = self.elements.get(self.current_screen, [])
+        # Only elements that react to this event type see it
+        interested_elements = self.event_dispatch.get(self.current_screen, {}).get(event.type, ())
         
-        for element in current_elements:
+        for element in interested_elements:
             if hasattr(element, 'handle_event'):
                 result = element.handle_event(event)
                 
@@ -266,55 +421,94 @@ class GameUI:
         """Update UI elements"""
         current_elements = self.elements.get(self.current_screen, [])
         
+        # One bounds test covers the common case of the pointer being away from every
+        # element; then nothing can be hovered and the per-button polls are skipped
+        bounds = self.screen_bounds.get(self.current_screen)
+        pointer_over_ui = bounds is not None and bounds.collidepoint(pygame.mouse.get_pos())
+        
         for element in current_elements:
-            if hasattr(element, 'update'):
+            if not pointer_over_ui and isinstance(element, Button):
+                element.is_hovered = False
+            elif hasattr(element, 'update'):
                 element.update(dt)
     
-    def draw(self, screen: pygame.Surface):
-        """Draw current screen UI"""
+    def draw(self, screen: pygame.Surface) -> List[pygame.Rect]:
+        """Draw current screen UI. Returns the screen areas that changed since the last draw."""
         current_elements = self.elements.get(self.current_screen, [])
         
+        # Elements do not overlap, so draw all shapes first, then every pre-rendered
+        # panel/button and content line in a single blits call
+        blits = []
         for element in current_elements:
-            element.draw(screen)
-        
-        # Draw additional content based on screen
-        if self.current_screen == "lobby":
-            self.draw_lobby_content(screen)
-        elif self.current_screen == "game":
-            self.draw_game_content(screen)
+            element.draw_primitives(screen)
+        for element in current_elements:
+            element.collect_blits(blits)
+        
+        # Add content based on screen, rebuilt only when the room state changes
+        if (self.current_screen != self._content_screen or 
+                self.room_state is not self._content_room_state):
+            self._content_blits = []
+            if self.current_screen == "lobby":
+                self.collect_lobby_content(self._content_blits)
+            elif self.current_screen == "game":
+                self.collect_game_content(self._content_blits)
+            self._content_screen = self.current_screen
+            self._content_room_state = self.room_state
+        blits.extend(self._content_blits)
+        
+        screen.blits(blits, doreturn=0)
+        
+        return self.get_dirty_rects(current_elements)
+    
+    def get_dirty_rects(self, elements: List) -> List[pygame.Rect]:
+        """Get the rects of elements whose look changed since the last call"""
+        drawn_states = self._drawn_states
+        dirty_rects = []
+        
+        # Screen content is drawn inside the panels, so a new room state dirties them all
+        content_changed = self.room_state is not self._drawn_room_state
+        self._drawn_room_state = self.room_state
+        
+        for element in elements:
+            state = element.get_draw_state()
+            if drawn_states.get(element) != state or (content_changed and isinstance(element, Panel)):
+                drawn_states[element] = state
+                dirty_rects.append(element.rect)
+        
+        return dirty_rects
     
-    def draw_lobby_content(self, screen: pygame.Surface):
-        """Draw lobby-specific content"""
+    def collect_lobby_content(self, blits: List[Tuple[pygame.Surface, Any]]):
+        """Append lobby-specific content blits"""
         if not self.room_state:
             return
         
         # Draw room info
-        font = pygame.font.Font(None, 20)
+        font = get_font(20)
         y_offset = self.room_panel.rect.y + 40
         
-        room_id_text = font.render(f"Room ID: {self.room_state.get('room_id', 'N/A')}", True, UI_TEXT)
-        screen.blit(room_id_text, (self.room_panel.rect.x + 10, y_offset))
+        room_id_text = render_cached(font, f"Room ID: {self.room_state.get('room_id', 'N/A')}", UI_TEXT)
+        blits.append((room_id_text, (self.room_panel.rect.x + 10, y_offset)))
         
-        room_name_text = font.render(f"Name: {self.room_state.get('room_name', 'N/A')}", True, UI_TEXT)
-        screen.blit(room_name_text, (self.room_panel.rect.x + 10, y_offset + 25))
+        room_name_text = render_cached(font, f"Name: {self.room_state.get('room_name', 'N/A')}", UI_TEXT)
+        blits.append((room_name_text, (self.room_panel.rect.x + 10, y_offset + 25)))
         
-        house_text = font.render(f"House: {self.room_state.get('house_name', 'None')}", True, UI_TEXT)
-        screen.blit(house_text, (self.room_panel.rect.x + 10, y_offset + 50))
+        house_text = render_cached(font, f"House: {self.room_state.get('house_name', 'None')}", UI_TEXT)
+        blits.append((house_text, (self.room_panel.rect.x + 10, y_offset + 50)))
         
         # Draw players
         y_offset = self.players_panel.rect.y + 40
         players = self.room_state.get('players', [])
         
         for i, player in enumerate(players):
-            player_text = font.render(f"• {player.get('username', 'Unknown')}", True, UI_TEXT)
-            screen.blit(player_text, (self.players_panel.rect.x + 10, y_offset + i * 25))
+            player_text = render_cached(font, f"• {player.get('username', 'Unknown')}", UI_TEXT)
+            blits.append((player_text, (self.players_panel.rect.x + 10, y_offset + i * 25)))
     
-    def draw_game_content(self, screen: pygame.Surface):
-        """Draw game-specific content"""
+    def collect_game_content(self, blits: List[Tuple[pygame.Surface, Any]]):
+        """Append game-specific content blits"""
         if not self.room_state:
             return
         
-        font = pygame.font.Font(None, 18)
+        font = get_font(18)
         
         # Draw tasks
         y_offset = self.task_panel.rect.y + 40
@@ -326,11 +520,11 @@ class GameUI:
             task_name = task.get('name', 'Unknown Task')
             is_complete = task_id in completed_tasks
             
-            color = TASK_COMPLETE if is_complete else TASK_INCOMPLETE
-            status = "✓" if is_complete else "○"
-            
-            task_text = font.render(f"{status} {task_name}", True, color)
-            screen.blit(task_text, (self.task_panel.rect.x + 10, y_offset + i * 20))
+            if is_complete:
+                task_text = render_cached(font, TASK_DONE_PREFIX + task_name, TASK_COMPLETE)
+            else:
+                task_text = render_cached(font, TASK_OPEN_PREFIX + task_name, TASK_INCOMPLETE)
+            blits.append((task_text, (self.task_panel.rect.x + 10, y_offset + i * 20)))
         
         # Draw players
         y_offset = self.player_panel.rect.y + 40
@@ -340,28 +534,32 @@ class GameUI:
             username = player.get('username', 'Unknown')
             is_connected = player.get('is_connected', False)
             
-            color = UI_TEXT if is_connected else UI_TEXT_DISABLED
-            status = "●" if is_connected else "○"
-            
-            player_text = font.render(f"{status} {username}", True, color)
-            screen.blit(player_text, (self.player_panel.rect.x + 10, y_offset + i * 20))
+            if is_connected:
+                player_text = render_cached(font, PLAYER_ONLINE_PREFIX + username, UI_TEXT)
+            else:
+                player_text = render_cached(font, PLAYER_OFFLINE_PREFIX + username, UI_TEXT_DISABLED)
+            blits.append((player_text, (self.player_panel.rect.x + 10, y_offset + i * 20)))
         
         # Draw floor info
-        font = pygame.font.Font(None, 24)
+        font = get_font(24)
         current_floor = self.room_state.get('current_floor', 1)
         max_floors = self.room_state.get('max_floors', 1)
         house_name = self.room_state.get('house_name', 'Unknown House')
         tasks_remaining = self.room_state.get('tasks_remaining', 0)
         
-        floor_text = font.render(f"{house_name} - Floor {current_floor}/{max_floors}", True, UI_TEXT)
-        screen.blit(floor_text, (self.floor_panel.rect.x + 10, self.floor_panel.rect.y + 10))
+        floor_text = render_cached(font, f"{house_name} - Floor {current_floor}/{max_floors}", UI_TEXT)
+        blits.append((floor_text, (self.floor_panel.rect.x + 10, self.floor_panel.rect.y + 10)))
         
-        tasks_text = font.render(f"Tasks remaining: {tasks_remaining}", True, UI_TEXT)
-        screen.blit(tasks_text, (self.floor_panel.rect.x + 10, self.floor_panel.rect.y + 35))
+        tasks_text = render_cached(font, f"Tasks remaining: {tasks_remaining}", UI_TEXT)
+        blits.append((tasks_text, (self.floor_panel.rect.x + 10, self.floor_panel.rect.y + 35)))
     
     def set_screen(self, screen: str):
         """Change current screen"""
         self.current_screen = screen
+        
+        # Everything on the new screen counts as changed on its first draw
+        self._drawn_states.clear()
+        self._drawn_room_state = None
     
     def update_room_state(self, room_state: Dict[str, Any]):
         """Update room state for UI display"""
@@ -17,10 +17,24 @@ MAX_PLAYERS_PER_ROOM = 5
 ROOM_ID_LENGTH = 8
 DEFAULT_HOUSE_COUNT = 10
 DEFAULT_FLOORS_PER_HOUSE = 3
+POSITION_DELTA_SCALE = 2  # player_move dx/dy are sent in 1/2 pixel units
+INACTIVE_ROOM_TTL = 86400  # seconds an inactive room is kept before MongoDB deletes it
+DB_FLUSH_INTERVAL = 0.025  # seconds room updates are coalesced before one bulk write
+
+# Redis settings; set REDIS_URL to share rooms and room broadcasts between server workers
+REDIS_URL = os.getenv("REDIS_URL")
+REDIS_CHANNEL_PREFIX = "room:"
+ROOM_CACHE_TTL = 0.1  # seconds a worker serves its copy of a shared room before re-reading it
 
 # WebSocket settings
 PING_INTERVAL = 20
 PING_TIMEOUT = 10
+BROADCAST_BATCH_SIZE = 50  # sockets queued to per event loop pass during a broadcast
+SEND_QUEUE_SIZE = 64  # frames buffered per connection before new ones are dropped
+MSGPACK_SUBPROTOCOL = "msgpack"  # clients offering this subprotocol get binary msgpack frames
+POSITION_BROADCAST_INTERVAL = 0.05  # seconds between batched positions broadcasts (20 Hz)
+POSITIONS_FRAME_SCHEMA = 1  # first byte of binary positions frames; msgpack messages (maps) never start with it
+MAX_USER_ID_LENGTH = 64  # bytes; longer uids are refused at connect, positions frames give a uid one length byte
 
 # Collections
 USERS_COLLECTION = "users"
@@ -2,21 +2,60 @@
 Database connection and operations for ChaseHome
 """
 import asyncio
+import copy
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 from pymongo.errors import DuplicateKeyError
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 
-from config import MONGODB_URL, DATABASE_NAME
-from models import User, Room, Task, House
+from config import MONGODB_URL, DATABASE_NAME, INACTIVE_ROOM_TTL, DB_FLUSH_INTERVAL
+from models import User, Room, RoomSummary, Task, House
 
 logger = logging.getLogger(__name__)
 
+# Seed data, inserted when the collections are empty
+DEFAULT_HOUSES = [
+    {"id": 1, "name": "Bakımsız Apartman", "theme": "abandoned", "floors": 3, "horror_type": "Gölgeler", "description": "Eski ve bakımsız bir apartman", "tasks_per_floor": 3},
+    {"id": 2, "name": "Terkedilmiş Malikâne", "theme": "mansion", "floors": 4, "horror_type": "Aynada görünen yaratık", "description": "Büyük ve karanlık bir malikane", "tasks_per_floor": 3},
+    {"id": 3, "name": "Yetimhane", "theme": "orphanage", "floors": 5, "horror_type": "Çocuk fısıltısı", "description": "Terk edilmiş yetimhane", "tasks_per_floor": 3},
+    {"id": 4, "name": "Tren Garı", "theme": "station", "floors": 3, "horror_type": "Anonslu jumpscare", "description": "Eski tren garı", "tasks_per_floor": 3},
+    {"id": 5, "name": "Fabrika", "theme": "factory", "floors": 4, "horror_type": "Metal sürtme sesleri", "description": "Terk edilmiş fabrika", "tasks_per_floor": 3},
+    {"id": 6, "name": "Orman içi ev", "theme": "forest", "floors": 3, "horror_type": "Ağaçlarda yaratık", "description": "Ormanda kaybolmuş ev", "tasks_per_floor": 3},
+    {"id": 7, "name": "Lüks villa", "theme": "villa", "floors": 5, "horror_type": "Sessizlik + ani ışık", "description": "Lüks ama lanetli villa", "tasks_per_floor": 3},
+    {"id": 8, "name": "Terkedilmiş hastane", "theme": "hospital", "floors": 5, "horror_type": "Hasta yatakları", "description": "Eski hastane binası", "tasks_per_floor": 3},
+    {"id": 9, "name": "Laboratuvar", "theme": "lab", "floors": 4, "horror_type": "Biyolojik varlıklar", "description": "Araştırma laboratuvarı", "tasks_per_floor": 3},
+    {"id": 10, "name": "Kütüphane", "theme": "library", "floors": 3, "horror_type": "Kitaplar düşüyor, notlar yazıyor", "description": "Büyük eski kütüphane", "tasks_per_floor": 3},
+]
+
+TASK_TEMPLATES = [
+    {"id": "fix_power", "name": "Sigorta Kutusunu Onar", "description": "Işıklar gelsin", "task_type": "repair"},
+    {"id": "fix_photo", "name": "Eski Fotoğrafı Yeniden Kur", "description": "Parçaları sırayla birleştir", "task_type": "puzzle"},
+    {"id": "open_coded_door", "name": "Kodlu Kapıyı Aç", "description": "Sayıları evdeki nesnelerden bul", "task_type": "puzzle"},
+    {"id": "fix_toy", "name": "Kurmalı Oyuncak Tamiri", "description": "Dişlileri sırayla tak", "task_type": "repair"},
+    {"id": "reopen_door", "name": "Kapanan Kapıyı Yeniden Aç", "description": "Diğer katlardan güç ver", "task_type": "interact"},
+    {"id": "adjust_radio", "name": "Radyo Frekansı Ayarla", "description": "Doğru frekansla gizli mesajı al", "task_type": "interact"},
+    {"id": "find_key", "name": "Kayıp Anahtarı Bul", "description": "Random spawn – herkes arar", "task_type": "collect"},
+    {"id": "fix_leak", "name": "Su Sızıntısını Kapat", "description": "Boru parçalarını birleştir", "task_type": "repair"},
+    {"id": "sort_books", "name": "Kitapları Sıralama", "description": "Harf sırasına göre yerleştir", "task_type": "puzzle"},
+    {"id": "collect_notebook", "name": "Not Defterini Topla", "description": "Sayfalar 4 farklı yerde", "task_type": "collect"},
+]
+
 class Database:
     def __init__(self):
         self.client: Optional[AsyncIOMotorClient] = None
         self.db = None
+        
+        # Room updates waiting for the next bulk write: room_id -> {"$set": {field: value},
+        # "$addToSet": {field: [values]}, "$pull": {field: [values]}, "players": {uid: player or None}}
+        self._pending_room_updates: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()  # one flush at a time, so queued batches land in order
+        
+        # Houses are seeded once and read-only, so they are loaded once and kept
+        self._house_cache: Dict[int, House] = {}
+        self._house_cache_loaded = False
     
     async def connect(self):
         """Connect to MongoDB"""
@@ -33,12 +72,24 @@ class Database:
             # Initialize default data
             await self.initialize_default_data()
             
+            # Start coalescing room writes
+            self._flush_task = asyncio.create_task(self._flush_loop())
+            
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
     
     async def disconnect(self):
         """Disconnect from MongoDB"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+            await self.flush_room_updates()
+        
         if self.client:
             self.client.close()
             logger.info("Disconnected from MongoDB")
@@ -52,7 +103,11 @@ class Database:
             
             # Rooms collection indexes
             await self.db.rooms.create_index("room_id", unique=True)
-            await self.db.rooms.create_index("is_active")
+            # Compound index; its is_active prefix serves the active-room listing
+            await self.db.rooms.create_index([("is_active", 1), ("room_id", 1), ("name", 1)])
+            # MongoDB's TTL monitor deletes rooms left inactive for INACTIVE_ROOM_TTL
+            await self.db.rooms.create_index("last_active", expireAfterSeconds=INACTIVE_ROOM_TTL,
+                                             partialFilterExpression={"is_active": False})
             
             # Tasks collection indexes
             await self.db.tasks.create_index("id", unique=True)
@@ -69,7 +124,7 @@ class Database:
     async def create_user(self, user: User) -> bool:
         """Create a new user"""
         try:
-            await self.db.users.insert_one(user.dict())
+            await self.db.users.insert_one(user.to_bson())
             return True
         except DuplicateKeyError:
             return False
@@ -111,7 +166,7 @@ class Database:
     async def create_room(self, room: Room) -> bool:
         """Create a new room"""
         try:
-            await self.db.rooms.insert_one(room.dict())
+            await self.db.rooms.insert_one(room.to_bson())
             return True
         except DuplicateKeyError:
             return False
@@ -131,22 +186,160 @@ class Database:
             return None
     
     async def update_room(self, room: Room) -> bool:
-        """Update room data"""
+        """Replace the whole room document (prefer update_room_fields for partial changes)"""
         try:
+            # The full document supersedes any queued partial updates
+            self._pending_room_updates.pop(room.room_id, None)
+            room.last_active = datetime.now(timezone.utc)
             result = await self.db.rooms.replace_one(
                 {"room_id": room.room_id},
-                room.dict()
+                room.to_bson()
             )
             return result.modified_count > 0
         except Exception as e:
             logger.error(f"Failed to update room: {e}")
             return False
     
-    async def get_active_rooms(self) -> List[Room]:
-        """Get all active rooms"""
+    async def update_room_fields(self, room_id: str, changes: Optional[Dict[str, Any]] = None, 
+                                 add_to_set: Optional[Dict[str, Any]] = None, 
+                                 pull: Optional[Dict[str, Any]] = None) -> bool:
+        """Queue an update of only the given room fields ($set), plus optional array
+        $addToSet/$pull. Updates to the same room are merged and written together
+        by the next flush. Returns True once queued.
+        """
+        if not (changes or add_to_set or pull):
+            return False
+        
+        pending = self._pending_room(room_id)
+        set_fields = pending["$set"]
+        add_fields = pending["$addToSet"]
+        pull_fields = pending["$pull"]
+        
+        for field, value in (changes or {}).items():
+            # A whole new value supersedes queued element changes to the same array
+            add_fields.pop(field, None)
+            pull_fields.pop(field, None)
+            if field == "players":
+                pending["players"].clear()
+            set_fields[field] = value
+        
+        for field, value in (add_to_set or {}).items():
+            if field in set_fields:
+                if value not in set_fields[field]:
+                    set_fields[field] = set_fields[field] + [value]
+                continue
+            if value in pull_fields.get(field, ()):
+                pull_fields[field].remove(value)
+            values = add_fields.setdefault(field, [])
+            if value not in values:
+                values.append(value)
+        
+        for field, value in (pull or {}).items():
+            if field in set_fields:
+                set_fields[field] = [item for item in set_fields[field] if item != value]
+                continue
+            if value in add_fields.get(field, ()):
+                add_fields[field].remove(value)
+            values = pull_fields.setdefault(field, [])
+            if value not in values:
+                values.append(value)
+        
+        return True
+    
+    def _pending_room(self, room_id: str) -> Dict[str, Dict[str, Any]]:
+        """Get the queued updates of a room, starting an empty entry if there are none"""
+        return self._pending_room_updates.setdefault(
+            room_id, {"$set": {}, "$addToSet": {}, "$pull": {}, "players": {}})
+    
+    async def update_room_player(self, room_id: str, uid: str, player: Optional[Dict[str, Any]] = None) -> bool:
+        """Queue adding or replacing one player of a room, or removing it when player is None.
+        Only that player's entry is written, so changes to other players are left alone.
+        Returns True once queued.
+        """
+        pending = self._pending_room(room_id)
+        set_players = pending["$set"].get("players")
+        if set_players is not None:
+            # A whole new player list is already queued; change it instead
+            set_players = [item for item in set_players if item["uid"] != uid]
+            if player is not None:
+                set_players.append(player)
+            pending["$set"]["players"] = set_players
+            return True
+        
+        # Only the latest change per player is written
+        pending["players"][uid] = player
+        return True
+    
+    async def flush_room_updates(self):
+        """Write all queued room updates in one bulk write"""
+        async with self._flush_lock:
+            await self._write_room_updates()
+    
+    async def _write_room_updates(self):
+        """Write all queued room updates; callers hold the flush lock"""
+        if not self._pending_room_updates:
+            return
+        
+        pending_updates = self._pending_room_updates
+        self._pending_room_updates = {}
+        
+        # Every write refreshes last_active, which the inactive-room TTL index keys on
+        now = datetime.now(timezone.utc)
+        operations = []
+        for room_id, pending in pending_updates.items():
+            update = {"$set": {**pending["$set"], "last_active": now}}
+            add_fields = {field: {"$each": values} for field, values in pending["$addToSet"].items() if values}
+            if add_fields:
+                update["$addToSet"] = add_fields
+            pull_fields = {field: {"$in": values} for field, values in pending["$pull"].items() if values}
+            
+            # Each player change is one atomic update: removals are pulled by uid, and a
+            # player is replaced in place if present or pushed if not (exactly one matches)
+            removed = [uid for uid, player in pending["players"].items() if player is None]
+            if removed:
+                pull_fields["players"] = {"uid": {"$in": removed}}
+            if pull_fields:
+                update["$pull"] = pull_fields
+            operations.append(UpdateOne({"room_id": room_id}, update))
+            
+            for uid, player in pending["players"].items():
+                if player is not None:
+                    operations.append(UpdateOne({"room_id": room_id, "players.uid": uid},
+                                                {"$set": {"players.$": player}}))
+                    operations.append(UpdateOne({"room_id": room_id, "players.uid": {"$ne": uid}},
+                                                {"$push": {"players": player}}))
+        
+        try:
+            await self.db.rooms.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Failed to flush room updates: {e}")
+    
+    async def _flush_loop(self):
+        """Flush queued room updates every DB_FLUSH_INTERVAL seconds"""
+        while True:
+            await asyncio.sleep(DB_FLUSH_INTERVAL)
+            await self.flush_room_updates()
+    
+    async def iter_active_rooms(self, batch_size: int = 64) -> AsyncIterator[RoomSummary]:
+        """Yield a summary of each active room as the cursor delivers it"""
+        # Only the listing fields leave the server; players are counted in MongoDB
+        cursor = self.db.rooms.aggregate([
+            {"$match": {"is_active": True}},
+            {"$project": {
+                "_id": 0,
+                "room_id": 1,
+                "name": 1,
+                "max_players": 1,
+                "players": {"$size": "$players"}
+            }}
+        ], batchSize=batch_size)
+        async for room_data in cursor:
+            yield RoomSummary(**room_data)
+    
+    async def get_active_rooms(self) -> List[RoomSummary]:
+        """Get a summary of all active rooms; use get_room for full room data"""
         try:
-            rooms_data = await self.db.rooms.find({"is_active": True}).to_list(None)
-            return [Room(**room_data) for room_data in rooms_data]
+            return [room async for room in self.iter_active_rooms()]
         except Exception as e:
             logger.error(f"Failed to get active rooms: {e}")
             return []
@@ -165,13 +358,24 @@ class Database:
             return []
     
     # House operations
+    async def _load_houses(self):
+        """Fill the house cache with one query, if not loaded yet"""
+        if self._house_cache_loaded:
+            return
+        houses_data = await self.db.houses.find().to_list(None)
+        self._house_cache = {house_data["id"]: House(**house_data) for house_data in houses_data}
+        self._house_cache_loaded = True
+    
+    def reload_houses(self):
+        """Drop cached houses so the next read loads them from the database again"""
+        self._house_cache = {}
+        self._house_cache_loaded = False
+    
     async def get_house(self, house_id: int) -> Optional[House]:
         """Get house by ID"""
         try:
-            house_data = await self.db.houses.find_one({"id": house_id})
-            if house_data:
-                return House(**house_data)
-            return None
+            await self._load_houses()
+            return self._house_cache.get(house_id)
         except Exception as e:
             logger.error(f"Failed to get house: {e}")
             return None
@@ -179,8 +383,8 @@ class Database:
     async def get_all_houses(self) -> List[House]:
         """Get all houses"""
         try:
-            houses_data = await self.db.houses.find().to_list(None)
-            return [House(**house_data) for house_data in houses_data]
+            await self._load_houses()
+            return list(self._house_cache.values())
         except Exception as e:
             logger.error(f"Failed to get houses: {e}")
             return []
@@ -188,74 +392,64 @@ class Database:
     async def initialize_default_data(self):
         """Initialize default game data if not exists"""
         try:
-            # Check if houses exist
-            house_count = await self.db.houses.count_documents({})
+            # Check if houses and tasks exist
+            house_count, task_count = await asyncio.gather(
+                self.db.houses.count_documents({}),
+                self.db.tasks.count_documents({})
+            )
+            
             if house_count == 0:
-                await self._create_default_houses()
+                houses = await self._create_default_houses()
+            else:
+                houses = None
             
-            # Check if tasks exist
-            task_count = await self.db.tasks.count_documents({})
             if task_count == 0:
-                await self._create_default_tasks()
+                if houses is None:
+                    houses = await self.db.houses.find().to_list(None)
+                await self._create_default_tasks(houses)
                 
             logger.info("Default data initialized")
         except Exception as e:
             logger.error(f"Failed to initialize default data: {e}")
     
-    async def _create_default_houses(self):
-        """Create default houses"""
-        houses = [
-            {"id": 1, "name": "Bakımsız Apartman", "theme": "abandoned", "floors": 3, "horror_type": "Gölgeler", "description": "Eski ve bakımsız bir apartman", "tasks_per_floor": 3},
-            {"id": 2, "name": "Terkedilmiş Malikâne", "theme": "mansion", "floors": 4, "horror_type": "Aynada görünen yaratık", "description": "Büyük ve karanlık bir malikane", "tasks_per_floor": 3},
-            {"id": 3, "name": "Yetimhane", "theme": "orphanage", "floors": 5, "horror_type": "Çocuk fısıltısı", "description": "Terk edilmiş yetimhane", "tasks_per_floor": 3},
-            {"id": 4, "name": "Tren Garı", "theme": "station", "floors": 3, "horror_type": "Anonslu jumpscare", "description": "Eski tren garı", "tasks_per_floor": 3},
-            {"id": 5, "name": "Fabrika", "theme": "factory", "floors": 4, "horror_type": "Metal sürtme sesleri", "description": "Terk edilmiş fabrika", "tasks_per_floor": 3},
-            {"id": 6, "name": "Orman içi ev", "theme": "forest", "floors": 3, "horror_type": "Ağaçlarda yaratık", "description": "Ormanda kaybolmuş ev", "tasks_per_floor": 3},
-            {"id": 7, "name": "Lüks villa", "theme": "villa", "floors": 5, "horror_type": "Sessizlik + ani ışık", "description": "Lüks ama lanetli villa", "tasks_per_floor": 3},
-            {"id": 8, "name": "Terkedilmiş hastane", "theme": "hospital", "floors": 5, "horror_type": "Hasta yatakları", "description": "Eski hastane binası", "tasks_per_floor": 3},
-            {"id": 9, "name": "Laboratuvar", "theme": "lab", "floors": 4, "horror_type": "Biyolojik varlıklar", "description": "Araştırma laboratuvarı", "tasks_per_floor": 3},
-            {"id": 10, "name": "Kütüphane", "theme": "library", "floors": 3, "horror_type": "Kitaplar düşüyor, notlar yazıyor", "description": "Büyük eski kütüphane", "tasks_per_floor": 3},
-        ]
-        
+    async def _create_default_houses(self) -> List[Dict[str, Any]]:
+        """Create default houses and return their documents"""
+        # insert_many adds _id to the documents in place, so keep the constant pristine
+        houses = copy.deepcopy(DEFAULT_HOUSES)
         await self.db.houses.insert_many(houses)
+        self.reload_houses()
+        return houses
     
-    async def _create_default_tasks(self):
-        """Create default tasks for all houses and floors"""
-        task_templates = [
-            {"id": "fix_power", "name": "Sigorta Kutusunu Onar", "description": "Işıklar gelsin", "task_type": "repair"},
-            {"id": "fix_photo", "name": "Eski Fotoğrafı Yeniden Kur", "description": "Parçaları sırayla birleştir", "task_type": "puzzle"},
-            {"id": "open_coded_door", "name": "Kodlu Kapıyı Aç", "description": "Sayıları evdeki nesnelerden bul", "task_type": "puzzle"},
-            {"id": "fix_toy", "name": "Kurmalı Oyuncak Tamiri", "description": "Dişlileri sırayla tak", "task_type": "repair"},
-            {"id": "reopen_door", "name": "Kapanan Kapıyı Yeniden Aç", "description": "Diğer katlardan güç ver", "task_type": "interact"},
-            {"id": "adjust_radio", "name": "Radyo Frekansı Ayarla", "description": "Doğru frekansla gizli mesajı al", "task_type": "interact"},
-            {"id": "find_key", "name": "Kayıp Anahtarı Bul", "description": "Random spawn – herkes arar", "task_type": "collect"},
-            {"id": "fix_leak", "name": "Su Sızıntısını Kapat", "description": "Boru parçalarını birleştir", "task_type": "repair"},
-            {"id": "sort_books", "name": "Kitapları Sıralama", "description": "Harf sırasına göre yerleştir", "task_type": "puzzle"},
-            {"id": "collect_notebook", "name": "Not Defterini Topla", "description": "Sayfalar 4 farklı yerde", "task_type": "collect"},
-        ]
+    async def _create_default_tasks(self, houses: List[Dict[str, Any]]):
+        """Create default tasks for all floors of the given house documents"""
+        
+        house_models = [House(**house_data) for house_data in houses]
         
-        tasks = []
-        for house_id in range(1, 11):
-            house = await self.get_house(house_id)
-            if house:
-                for floor in range(1, house.floors + 1):
-                    for i in range(house.tasks_per_floor):
-                        template = task_templates[i % len(task_templates)]
-                        task = {
-                            "id": f"{template['id']}_{house_id}_{floor}_{i}",
-                            "name": template["name"],
-                            "description": template["description"],
-                            "house_id": house_id,
-                            "floor": floor,
-                            "room": f"room_{i + 1}",
-                            "steps": 1,
-                            "position": {"x": 100 + i * 150, "y": 200},
-                            "interact_time": 3.0,
-                            "task_type": template["task_type"]
-                        }
-                        tasks.append(task)
+        # Per-slot values depend only on the task index, so build them once
+        slot_count = max((house.tasks_per_floor for house in house_models), default=0)
+        slots = [(i, TASK_TEMPLATES[i % len(TASK_TEMPLATES)], f"room_{i + 1}", 100 + i * 150)
+                 for i in range(slot_count)]
+        
+        tasks = [
+            {
+                "id": f"{template['id']}_{house.id}_{floor}_{i}",
+                "name": template["name"],
+                "description": template["description"],
+                "house_id": house.id,
+                "floor": floor,
+                "room": room,
+                "steps": 1,
+                "position": {"x": x, "y": 200},
+                "interact_time": 3.0,
+                "task_type": template["task_type"]
+            }
+            for house in house_models
+            for floor in range(1, house.floors + 1)
+            for i, template, room, x in slots[:house.tasks_per_floor]
+        ]
         
-        await self.db.tasks.insert_many(tasks)
+        # Task ids are unique, so inserts need not be applied in order
+        await self.db.tasks.insert_many(tasks, ordered=False)
 
 # Global database instance
 db = Database()
\ No newline at end of file
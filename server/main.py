@@ -4,31 +4,65 @@ Main FastAPI server for ChaseHome game
 import asyncio
 import json
 import logging
+import struct
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 import uuid
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from config import HOST, PORT, DEBUG
+from config import (HOST, PORT, DEBUG, POSITION_DELTA_SCALE, BROADCAST_BATCH_SIZE, MSGPACK_SUBPROTOCOL,
+                    POSITION_BROADCAST_INTERVAL, POSITIONS_FRAME_SCHEMA, REDIS_URL, REDIS_CHANNEL_PREFIX,
+                    SEND_QUEUE_SIZE, MAX_USER_ID_LENGTH)
 from database import db
-from models import User, Room, GameEvent, PlayerState
+from models import User, Room, GameEvent, PlayerState, model_to_dict
 from room_manager import room_manager
 
+# msgpack is optional; without it every client stays on JSON text frames
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# redis is optional; without it broadcasts only reach this process's sockets
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+# orjson is an optional, much faster JSON codec; fall back to the stdlib if missing
+try:
+    import orjson
+    
+    def json_dumps(message: dict) -> str:
+        return orjson.dumps(message).decode()
+    
+    json_loads = orjson.loads
+    DefaultResponse = ORJSONResponse
+except ImportError:
+    json_dumps = json.dumps
+    json_loads = json.loads
+    DefaultResponse = JSONResponse
+
 # Configure logging
 logging.basicConfig(level=logging.INFO if not DEBUG else logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Tags messages this worker published, so it skips them when they come back from Redis
+WORKER_ID = uuid.uuid4().hex
+
 # FastAPI app
-app = FastAPI(title="ChaseHome Server", version="1.0.0")
+app = FastAPI(title="ChaseHome Server", version="1.0.0", default_response_class=DefaultResponse)
 
-# CORS middleware for web clients
+# CORS middleware for web clients. It only acts on HTTP requests: WebSocket connections
+# are passed straight through once, at connect, and frames never go through middleware
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -37,16 +71,148 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def quantize_coordinate(value: float) -> int:
+    """Round a coordinate to a whole pixel that fits in an int16"""
+    return max(-32768, min(32767, round(value)))
+
+def pack_positions(snapshot: Dict[str, Tuple[int, int]]) -> bytes:
+    """Pack a positions snapshot into a binary frame.
+    
+    The frame is a POSITIONS_FRAME_SCHEMA byte followed, per player, by a
+    length-prefixed uid and the x, y coordinates as big-endian int16.
+    """
+    parts = [bytes((POSITIONS_FRAME_SCHEMA,))]
+    for user_id, (x, y) in snapshot.items():
+        uid = user_id.encode()
+        parts.append(struct.pack(f"!B{len(uid)}shh", len(uid), uid, x, y))
+    return b"".join(parts)
+
+# Fixed parts of a JSON positions frame, filled in by positions_text
+POSITIONS_TEXT_PREFIX = '{"event":"positions","data":{'
+POSITIONS_TEXT_SUFFIX = '}}'
+
+def positions_text(snapshot: Dict[str, Tuple[int, int]]) -> str:
+    """Encode a positions snapshot as a JSON frame straight from the template, without message dicts"""
+    return POSITIONS_TEXT_PREFIX + ",".join(
+        f'{json_dumps(user_id)}:{{"x":{x},"y":{y}}}' for user_id, (x, y) in snapshot.items()
+    ) + POSITIONS_TEXT_SUFFIX
+
+def send_event(text: Optional[str] = None, data: Optional[bytes] = None) -> Dict[str, Any]:
+    """Build the ASGI send event for a text or binary frame.
+    
+    Servers only read the event, so one event can be queued to every recipient of a broadcast.
+    """
+    if data is not None:
+        return {"type": "websocket.send", "bytes": data}
+    return {"type": "websocket.send", "text": text}
+
+# room_id -> (cached room state part, its JSON with the closing brace cut off)
+_ROOM_STATE_TEXT_CACHE: Dict[str, Tuple[Dict[str, Any], str]] = {}
+_ROOM_STATE_TEXT_CACHE_LIMIT = 256
+
+def room_state_text(room_id: str, state: Dict[str, Any], players: List[Dict[str, Any]]) -> str:
+    """Encode a room_state frame, reusing the JSON of the cached state part while it is unchanged"""
+    cached = _ROOM_STATE_TEXT_CACHE.get(room_id)
+    if cached is None or cached[0] is not state:
+        if len(_ROOM_STATE_TEXT_CACHE) >= _ROOM_STATE_TEXT_CACHE_LIMIT:
+            _ROOM_STATE_TEXT_CACHE.clear()
+        cached = (state, '{"event":"room_state","data":' + json_dumps(state)[:-1])
+        _ROOM_STATE_TEXT_CACHE[room_id] = cached
+    return cached[1] + ',"players":' + json_dumps(players) + '}}'
+
+async def get_room_state_message(room_id: str) -> Tuple[Optional[dict], Optional[str]]:
+    """Build a room_state message and its encoded JSON frame"""
+    parts = await room_manager.get_room_state_parts(room_id)
+    if not parts:
+        return None, None
+    
+    state, players = parts
+    message = {"event": "room_state", "data": {**state, "players": players}}
+    return message, room_state_text(room_id, state, players)
+
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}  # user_id -> websocket
         self.user_rooms: Dict[str, str] = {}  # user_id -> room_id
+        self.binary_connections: Set[str] = set()  # user_ids that negotiated msgpack frames
+        self.send_queues: Dict[str, asyncio.Queue] = {}  # user_id -> frames waiting to be written
+        self.writer_tasks: Dict[str, asyncio.Task] = {}  # user_id -> task draining its send queue
+        self.pending_positions: Dict[str, Dict[str, Tuple[int, int]]] = {}  # room_id -> user_id -> latest (x, y)
+        self.position_tasks: Dict[str, asyncio.Task] = {}  # room_id -> positions broadcast loop
+        self.redis = None
+        self.subscriber_task: Optional[asyncio.Task] = None
+    
+    async def start_pubsub(self):
+        """Subscribe to room broadcasts from other workers, if Redis is configured"""
+        if not REDIS_URL:
+            return
+        if aioredis is None:
+            logger.warning("REDIS_URL is set but redis is not installed; broadcasts stay local")
+            return
+        
+        try:
+            self.redis = aioredis.from_url(REDIS_URL)
+            pubsub = self.redis.pubsub()
+            await pubsub.psubscribe(f"{REDIS_CHANNEL_PREFIX}*")
+            self.subscriber_task = asyncio.create_task(self._forward_published(pubsub))
+            logger.info("Sharing room broadcasts through Redis")
+        except Exception as e:
+            logger.error(f"Failed to connect to Redis: {e}")
+            self.redis = None
+    
+    async def stop_pubsub(self):
+        """Stop forwarding broadcasts from other workers"""
+        if self.subscriber_task:
+            self.subscriber_task.cancel()
+            try:
+                await self.subscriber_task
+            except asyncio.CancelledError:
+                pass
+            self.subscriber_task = None
+        if self.redis:
+            await self.redis.close()
+            self.redis = None
+    
+    async def _forward_published(self, pubsub):
+        """Deliver room broadcasts published by other workers to local sockets"""
+        async for item in pubsub.listen():
+            if item["type"] != "pmessage":
+                continue
+            try:
+                envelope = json_loads(item["data"])
+                if envelope["worker"] == WORKER_ID:
+                    continue  # Already delivered locally when it was published
+                
+                message = envelope["message"]
+                room_id = item["channel"].decode()[len(REDIS_CHANNEL_PREFIX):]
+                text = None
+                pack = None
+                if message.get("event") == "positions":
+                    # Positions travel as (x, y) pairs; rebuild the frames clients expect
+                    snapshot = {user_id: tuple(position) for user_id, position in message["data"].items()}
+                    room_manager.apply_positions(room_id, snapshot)
+                    text = positions_text(snapshot)
+                    pack = lambda: pack_positions(snapshot)
+                await self._fanout(message, room_id, envelope.get("exclude_user"), text, pack)
+            except Exception as e:
+                logger.error(f"Failed to forward published broadcast: {e}")
     
     async def connect(self, websocket: WebSocket, user_id: str):
         """Accept WebSocket connection"""
-        await websocket.accept()
+        if msgpack and MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+            await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL)
+            self.binary_connections.add(user_id)
+        else:
+            await websocket.accept()
+            self.binary_connections.discard(user_id)
         self.active_connections[user_id] = websocket
+        
+        # Each socket is written by its own task, so a slow client only fills its own queue
+        self._stop_writer(user_id)
+        send_queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.send_queues[user_id] = send_queue
+        self.writer_tasks[user_id] = asyncio.create_task(self._writer(websocket, send_queue, user_id))
         logger.info(f"User {user_id} connected")
     
     def disconnect(self, user_id: str):
@@ -55,23 +221,155 @@ class ConnectionManager:
             del self.active_connections[user_id]
         if user_id in self.user_rooms:
             del self.user_rooms[user_id]
+        self.binary_connections.discard(user_id)
+        self._stop_writer(user_id)
         logger.info(f"User {user_id} disconnected")
     
-    async def send_personal_message(self, message: dict, user_id: str):
-        """Send message to specific user"""
-        if user_id in self.active_connections:
+    def _stop_writer(self, user_id: str):
+        """Cancel a user's writer task and drop its unsent frames"""
+        writer_task = self.writer_tasks.pop(user_id, None)
+        if writer_task:
+            writer_task.cancel()
+        self.send_queues.pop(user_id, None)
+    
+    async def _writer(self, websocket: WebSocket, send_queue: asyncio.Queue, user_id: str):
+        """Write queued frames to a socket in order"""
+        while True:
+            event = await send_queue.get()
             try:
-                await self.active_connections[user_id].send_text(json.dumps(message))
+                await websocket.send(event)
             except Exception as e:
                 logger.error(f"Failed to send message to {user_id}: {e}")
+                break
+        
+        # Stop queueing frames nobody will write, unless the user already reconnected
+        if self.send_queues.get(user_id) is send_queue:
+            del self.send_queues[user_id]
+            self.writer_tasks.pop(user_id, None)
+        
+        # Close the socket so its receive loop ends and runs the disconnect cleanup
+        try:
+            await websocket.close()
+        except Exception:
+            pass  # Already closed
     
-    async def broadcast_to_room(self, message: dict, room_id: str, exclude_user: Optional[str] = None):
-        """Broadcast message to all users in a room"""
-        connected_players = room_manager.get_connected_players(room_id)
-        for user_id in connected_players:
-            if exclude_user and user_id == exclude_user:
-                continue
-            await self.send_personal_message(message, user_id)
+    def _enqueue(self, user_id: str, event: Dict[str, Any]):
+        """Queue a send event for a user, dropping it if their queue is full"""
+        send_queue = self.send_queues.get(user_id)
+        if send_queue is None:
+            return  # Not connected (any more)
+        
+        try:
+            send_queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning(f"Send queue full for {user_id}, dropping message")
+    
+    def is_binary(self, user_id: str) -> bool:
+        """Check if a user receives msgpack frames instead of JSON"""
+        return user_id in self.binary_connections
+    
+    async def receive_message(self, websocket: WebSocket, user_id: str) -> dict:
+        """Receive and decode the next message from a user"""
+        if self.is_binary(user_id):
+            return msgpack.unpackb(await websocket.receive_bytes(), raw=False)
+        return json_loads(await websocket.receive_text())
+    
+    async def send_personal_message(self, message: dict, user_id: str, text: Optional[str] = None):
+        """Send message to specific user, optionally with its pre-encoded JSON frame"""
+        if user_id not in self.send_queues:
+            return
+        
+        try:
+            if self.is_binary(user_id):
+                self._enqueue(user_id, send_event(data=msgpack.packb(message, use_bin_type=True)))
+            else:
+                self._enqueue(user_id, send_event(text=json_dumps(message) if text is None else text))
+        except Exception as e:
+            logger.error(f"Failed to encode message for {user_id}: {e}")
+    
+    async def broadcast_to_room(self, message: dict, room_id: str, exclude_user: Optional[str] = None,
+                                text: Optional[str] = None, pack: Optional[Callable[[], bytes]] = None):
+        """Broadcast message to all users in a room, optionally with a pre-encoded JSON frame
+        and a function building its binary frame (only called when a recipient is binary)
+        """
+        await self._fanout(message, room_id, exclude_user, text, pack)
+        
+        # Other workers deliver it to the room's players connected to them
+        if self.redis:
+            try:
+                await self.redis.publish(f"{REDIS_CHANNEL_PREFIX}{room_id}", json_dumps({
+                    "worker": WORKER_ID,
+                    "exclude_user": exclude_user,
+                    "message": message
+                }))
+            except Exception as e:
+                logger.error(f"Failed to publish broadcast for room {room_id}: {e}")
+    
+    async def _fanout(self, message: dict, room_id: str, exclude_user: Optional[str] = None,
+                      text: Optional[str] = None, pack: Optional[Callable[[], bytes]] = None):
+        """Send a message to the room's users connected to this worker"""
+        connected_players = await room_manager.get_connected_players(room_id)
+        recipients = [user_id for user_id in connected_players
+                      if user_id != exclude_user and user_id in self.active_connections]
+        if not recipients:
+            return
+        
+        # Encode once per wire format that has recipients and share the send events between
+        # them; they are only queued here, each socket's writer sends them. A frame that
+        # fails to encode is skipped for its recipients only
+        text_event = None
+        packed_event = None
+        try:
+            if any(not self.is_binary(user_id) for user_id in recipients):
+                text_event = send_event(text=json_dumps(message) if text is None else text)
+        except Exception as e:
+            logger.error(f"Failed to encode text frame for room {room_id}: {e}")
+        try:
+            if any(self.is_binary(user_id) for user_id in recipients):
+                packed_event = send_event(data=msgpack.packb(message, use_bin_type=True) if pack is None else pack())
+        except Exception as e:
+            logger.error(f"Failed to encode binary frame for room {room_id}: {e}")
+        
+        # Large fanouts are queued in batches, yielding between them so other coroutines keep running
+        for i in range(0, len(recipients), BROADCAST_BATCH_SIZE):
+            if i:
+                await asyncio.sleep(0)
+            for user_id in recipients[i:i + BROADCAST_BATCH_SIZE]:
+                event = packed_event if user_id in self.binary_connections else text_event
+                if event is not None:
+                    self._enqueue(user_id, event)
+    
+    def queue_position(self, room_id: str, user_id: str, x: float, y: float):
+        """Queue a player's latest position for the room's next positions broadcast"""
+        self.pending_positions.setdefault(room_id, {})[user_id] = (quantize_coordinate(x), quantize_coordinate(y))
+        if room_id not in self.position_tasks:
+            self.position_tasks[room_id] = asyncio.create_task(self._broadcast_positions(room_id))
+    
+    async def _broadcast_positions(self, room_id: str):
+        """Broadcast the latest queued positions of a room every tick until the room closes"""
+        try:
+            while True:
+                await asyncio.sleep(POSITION_BROADCAST_INTERVAL)
+                if not room_manager.get_room(room_id):
+                    break
+                
+                # Only the newest position per player is sent; intermediate moves are dropped
+                snapshot = self.pending_positions.pop(room_id, None)
+                if not snapshot:
+                    continue
+                
+                # A failed tick only loses that snapshot; the loop keeps serving the room
+                try:
+                    await self.broadcast_to_room({
+                        "event": "positions",
+                        "data": snapshot
+                    }, room_id, text=positions_text(snapshot), pack=lambda: pack_positions(snapshot))
+                    await room_manager.share_positions(room_id, snapshot)
+                except Exception as e:
+                    logger.error(f"Positions broadcast failed for room {room_id}: {e}")
+        finally:
+            self.position_tasks.pop(room_id, None)
+            self.pending_positions.pop(room_id, None)
 
 manager = ConnectionManager()
 
@@ -91,10 +389,14 @@ class JoinRoomRequest(BaseModel):
 async def startup_event():
     """Initialize database connection on startup"""
     await db.connect()
+    await manager.start_pubsub()
+    room_manager.redis = manager.redis
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connection on shutdown"""
+    room_manager.redis = None
+    await manager.stop_pubsub()
     await db.disconnect()
 
 @app.get("/")
@@ -118,7 +420,7 @@ async def get_user(uid: str):
     """Get user by UID"""
     user = await db.get_user(uid)
     if user:
-        return user.dict()
+        return model_to_dict(user)
     else:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -126,25 +428,31 @@ async def get_user(uid: str):
 async def get_houses():
     """Get all available houses"""
     houses = await db.get_all_houses()
-    return [house.dict() for house in houses]
+    return [model_to_dict(house) for house in houses]
 
 @app.get("/api/rooms")
 async def get_active_rooms():
     """Get all active rooms"""
     rooms = await db.get_active_rooms()
-    return [{"room_id": room.room_id, "name": room.name, "players": len(room.players), "max_players": room.max_players} for room in rooms]
+    return [model_to_dict(room) for room in rooms]
 
 # WebSocket endpoint
 @app.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
     """Main WebSocket endpoint for game communication"""
+    if len(user_id.encode()) > MAX_USER_ID_LENGTH:
+        # Refused before the handshake completes; positions frames cannot carry the uid
+        await websocket.close(code=1008)
+        return
+    
+    # The uid keys every connection, room and position dict; one shared object lets lookups match by identity
+    user_id = sys.intern(user_id)
     await manager.connect(websocket, user_id)
     
     try:
         while True:
             # Receive message from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            message = await manager.receive_message(websocket, user_id)
             
             await handle_websocket_message(message, user_id)
             
@@ -173,27 +481,9 @@ async def handle_websocket_message(message: dict, user_id: str):
     data = message.get("data", {})
     
     try:
-        if event == "create_room":
-            await handle_create_room(data, user_id)
-        
-        elif event == "join_room":
-            await handle_join_room(data, user_id)
-        
-        elif event == "leave_room":
-            await handle_leave_room(data, user_id)
-        
-        elif event == "player_move":
-            await handle_player_move(data, user_id)
-        
-        elif event == "task_complete":
-            await handle_task_complete(data, user_id)
-        
-        elif event == "change_house":
-            await handle_change_house(data, user_id)
-        
-        elif event == "get_room_state":
-            await handle_get_room_state(data, user_id)
-        
+        handler = EVENT_HANDLERS.get(event)
+        if handler:
+            await handler(data, user_id)
         else:
             logger.warning(f"Unknown event: {event} from user {user_id}")
     
@@ -224,12 +514,9 @@ async def handle_create_room(data: dict, user_id: str):
         }, user_id)
         
         # Send initial room state
-        room_state = await room_manager.get_room_state(room_id)
-        if room_state:
-            await manager.send_personal_message({
-                "event": "room_state",
-                "data": room_state
-            }, user_id)
+        message, text = await get_room_state_message(room_id)
+        if message:
+            await manager.send_personal_message(message, user_id, text=text)
     else:
         await manager.send_personal_message({
             "event": "error",
@@ -263,12 +550,9 @@ async def handle_join_room(data: dict, user_id: str):
         }, room_id)
         
         # Send room state to new player
-        room_state = await room_manager.get_room_state(room_id)
-        if room_state:
-            await manager.send_personal_message({
-                "event": "room_state",
-                "data": room_state
-            }, user_id)
+        message, text = await get_room_state_message(room_id)
+        if message:
+            await manager.send_personal_message(message, user_id, text=text)
     else:
         await manager.send_personal_message({
             "event": "error",
@@ -302,21 +586,22 @@ async def handle_player_move(data: dict, user_id: str):
     room_id = manager.user_rooms.get(user_id)
     
     if room_id:
-        x = data.get("x", 0)
-        y = data.get("y", 0)
+        if "dx" in data or "dy" in data:
+            # Delta from the last position, in 1/POSITION_DELTA_SCALE pixel units
+            position = room_manager.get_player_position(room_id, user_id)
+            if position is None:
+                return
+            x = position["x"] + data.get("dx", 0) / POSITION_DELTA_SCALE
+            y = position["y"] + data.get("dy", 0) / POSITION_DELTA_SCALE
+        else:
+            x = data.get("x", 0)
+            y = data.get("y", 0)
         
         success = await room_manager.update_player_position(room_id, user_id, x, y)
         
         if success:
-            # Broadcast position to other players
-            await manager.broadcast_to_room({
-                "event": "player_moved",
-                "data": {
-                    "user_id": user_id,
-                    "x": x,
-                    "y": y
-                }
-            }, room_id, exclude_user=user_id)
+            # Sent to the room with the next batched positions broadcast
+            manager.queue_position(room_id, user_id, x, y)
 
 async def handle_task_complete(data: dict, user_id: str):
     """Handle task completion"""
@@ -354,25 +639,32 @@ async def handle_change_house(data: dict, user_id: str):
         
         if success:
             # Send updated room state to all players
-            room_state = await room_manager.get_room_state(room_id)
-            if room_state:
-                await manager.broadcast_to_room({
-                    "event": "room_state",
-                    "data": room_state
-                }, room_id)
+            message, text = await get_room_state_message(room_id)
+            if message:
+                await manager.broadcast_to_room(message, room_id, text=text)
 
 async def handle_get_room_state(data: dict, user_id: str):
     """Handle room state request"""
     room_id = manager.user_rooms.get(user_id)
     
     if room_id:
-        room_state = await room_manager.get_room_state(room_id)
-        if room_state:
-            await manager.send_personal_message({
-                "event": "room_state",
-                "data": room_state
-            }, user_id)
+        message, text = await get_room_state_message(room_id)
+        if message:
+            await manager.send_personal_message(message, user_id, text=text)
+
+# Incoming event name -> handler
+EVENT_HANDLERS = {
+    "create_room": handle_create_room,
+    "join_room": handle_join_room,
+    "leave_room": handle_leave_room,
+    "player_move": handle_player_move,
+    "task_complete": handle_task_complete,
+    "change_house": handle_change_house,
+    "get_room_state": handle_get_room_state,
+}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=HOST, port=PORT, debug=DEBUG)
\ No newline at end of file
+    # "auto" picks uvloop and httptools when installed, and the stock asyncio loop otherwise (e.g. on Windows)
+    uvicorn.run(app, host=HOST, port=PORT, loop="auto", http="auto", ws="websockets",
+                log_level="debug" if DEBUG else "info")
\ No newline at end of file
@@ -1,11 +1,45 @@
 """
 Data models for ChaseHome game
 """
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Set, Any, Union
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import datetime, timezone
 import uuid
 
+# Pydantic is unpinned; use the V2 API when installed and fall back to the V1 one
+try:
+    from pydantic import field_validator
+    
+    def before_validator(field: str):
+        """Validate a field before its type is checked"""
+        return field_validator(field, mode="before")
+    
+    def model_to_dict(model: BaseModel, **kwargs) -> Dict[str, Any]:
+        """Convert a model to a dict"""
+        return model.model_dump(**kwargs)
+    
+    def model_to_json(model: BaseModel, **kwargs) -> str:
+        """Encode a model as JSON"""
+        return model.model_dump_json(**kwargs)
+    
+    def model_from_json(model_class, data: Union[str, bytes]):
+        """Decode and validate a model from JSON"""
+        return model_class.model_validate_json(data)
+except ImportError:
+    from pydantic import validator
+    
+    def before_validator(field: str):
+        return validator(field, pre=True, allow_reuse=True)
+    
+    def model_to_dict(model: BaseModel, **kwargs) -> Dict[str, Any]:
+        return model.dict(**kwargs)
+    
+    def model_to_json(model: BaseModel, **kwargs) -> str:
+        return model.json(**kwargs)
+    
+    def model_from_json(model_class, data: Union[str, bytes]):
+        return model_class.parse_raw(data)
+
 class User(BaseModel):
     """User model for player data"""
     uid: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -16,6 +50,19 @@ class User(BaseModel):
     total_score: int = 0
     created_at: datetime = Field(default_factory=datetime.now)
     last_active: datetime = Field(default_factory=datetime.now)
+    
+    def to_bson(self) -> Dict[str, Any]:
+        """Build the MongoDB document directly from attributes, without a model walk"""
+        return {
+            "uid": self.uid,
+            "username": self.username,
+            "current_house": self.current_house,
+            "current_floor": self.current_floor,
+            "completed_tasks": list(self.completed_tasks),
+            "total_score": self.total_score,
+            "created_at": self.created_at,
+            "last_active": self.last_active
+        }
 
 class PlayerState(BaseModel):
     """Player state in a room"""
@@ -24,35 +71,80 @@ class PlayerState(BaseModel):
     position: Dict[str, float] = {"x": 100, "y": 100}
     is_connected: bool = True
     current_task: Optional[str] = None
+    
+    def to_bson(self) -> Dict[str, Any]:
+        """Build the MongoDB document directly from attributes, without a model walk"""
+        return {
+            "uid": self.uid,
+            "username": self.username,
+            "position": dict(self.position),
+            "is_connected": self.is_connected,
+            "current_task": self.current_task
+        }
 
 class Room(BaseModel):
     """Room model for multiplayer sessions"""
     room_id: str = Field(default_factory=lambda: str(uuid.uuid4())[:8].upper())
     name: str
-    players: List[PlayerState] = []
+    players: Dict[str, PlayerState] = {}  # uid -> player; stored and sent as a list
     max_players: int = 5
     current_house: int = 1
     current_floor: int = 1
     active_tasks: List[str] = []
-    completed_tasks: List[str] = []
+    completed_tasks: Set[str] = set()  # stored and sent as a list
     is_active: bool = True
     created_at: datetime = Field(default_factory=datetime.now)
+    # UTC, since MongoDB TTL expiry compares against UTC
+    last_active: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    
+    def to_bson(self) -> Dict[str, Any]:
+        """Build the MongoDB document directly from attributes, without a model walk"""
+        return {
+            "room_id": self.room_id,
+            "name": self.name,
+            "players": [player.to_bson() for player in self.players.values()],
+            "max_players": self.max_players,
+            "current_house": self.current_house,
+            "current_floor": self.current_floor,
+            "active_tasks": list(self.active_tasks),
+            "completed_tasks": list(self.completed_tasks),
+            "is_active": self.is_active,
+            "created_at": self.created_at,
+            "last_active": self.last_active
+        }
+    
+    @before_validator("players")
+    def _key_players(cls, value):
+        """Accept the stored list of players, keying it by uid"""
+        if isinstance(value, list):
+            return {(p["uid"] if isinstance(p, dict) else p.uid): p for p in value}
+        return value
+    
+    @property
+    def player_list(self) -> List[PlayerState]:
+        """Get players in join order"""
+        return list(self.players.values())
     
     def add_player(self, player: PlayerState) -> bool:
         """Add a player to the room"""
         if len(self.players) >= self.max_players:
             return False
         
-        # Remove existing player with same uid
-        self.players = [p for p in self.players if p.uid != player.uid]
-        self.players.append(player)
+        # Replaces an existing player with same uid, moving it to the end
+        self.players.pop(player.uid, None)
+        self.players[player.uid] = player
         return True
     
     def remove_player(self, uid: str) -> bool:
         """Remove a player from the room"""
-        initial_count = len(self.players)
-        self.players = [p for p in self.players if p.uid != uid]
-        return len(self.players) < initial_count
+        return self.players.pop(uid, None) is not None
+
+class RoomSummary(BaseModel):
+    """Lightweight room listing entry"""
+    room_id: str
+    name: str
+    players: int = 0  # number of players in the room
+    max_players: int = 5
 
 class Task(BaseModel):
     """Task model for game objectives"""
@@ -67,6 +159,22 @@ class Task(BaseModel):
     interact_time: float = 3.0
     requires_all_players: bool = False
     task_type: str = "interact"  # interact, puzzle, collect, repair
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Build the client-facing dict directly from attributes, without a model walk"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "house_id": self.house_id,
+            "floor": self.floor,
+            "room": self.room,
+            "steps": self.steps,
+            "position": dict(self.position),
+            "interact_time": self.interact_time,
+            "requires_all_players": self.requires_all_players,
+            "task_type": self.task_type
+        }
 
 class House(BaseModel):
     """House model for game levels"""
@@ -4,18 +4,210 @@ Room management for ChaseHome multiplayer sessions
 import asyncio
 import json
 import logging
-from typing import Dict, List, Optional, Set
+import sys
+from time import monotonic
+from typing import AbstractSet, Callable, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
 
-from models import Room, PlayerState, User, GameEvent
+from config import REDIS_CHANNEL_PREFIX, INACTIVE_ROOM_TTL, ROOM_CACHE_TTL
+from models import Room, PlayerState, User, GameEvent, Task, model_to_json, model_from_json
 from database import db
 
+# redis is optional; without it rooms live only in this process
+try:
+    from redis.exceptions import WatchError
+except ImportError:
+    class WatchError(Exception):
+        """Stand-in for the except clauses of the Redis paths, which never run without redis"""
+
 logger = logging.getLogger(__name__)
 
 class RoomManager:
     def __init__(self):
+        # room_id -> room; with Redis this is the worker's copy of the shared room, re-read every ROOM_CACHE_TTL
         self.active_rooms: Dict[str, Room] = {}
-        self.player_connections: Dict[str, Set[str]] = {}  # room_id -> set of user_ids
+        # room_id -> room state minus players; dropped whenever house, floor or tasks change
+        self._state_cache: Dict[str, Dict] = {}
+        self.redis = None  # room store shared by every worker, set on startup when Redis is configured
+        self._synced_at: Dict[str, float] = {}  # room_id -> when the local copy was last read from Redis
+        self._shared_state: Dict[str, bytes] = {}  # room_id -> shared state as last read, to spot changes
+    
+    def _keys(self, room_id: str) -> Tuple[str, str, str]:
+        """Get the Redis keys of a room's state, member set and player hash"""
+        key = f"{REDIS_CHANNEL_PREFIX}{room_id}"
+        return f"{key}:state", f"{key}:conns", f"{key}:players"
+    
+    def _forget_room(self, room_id: str):
+        """Drop this worker's copy of a room"""
+        self.active_rooms.pop(room_id, None)
+        self._state_cache.pop(room_id, None)
+        self._synced_at.pop(room_id, None)
+        self._shared_state.pop(room_id, None)
+    
+    def apply_positions(self, room_id: str, snapshot: Dict[str, Tuple[float, float]]):
+        """Take the positions of players on other workers from a positions broadcast they published"""
+        # Only the players' own workers see their moves; this keeps the local copy current between ticks
+        room = self.active_rooms.get(room_id)
+        if not room:
+            return
+        
+        for uid, (x, y) in snapshot.items():
+            player = room.players.get(uid)
+            if player:
+                position = player.position
+                position["x"] = x
+                position["y"] = y
+    
+    async def _seed_shared_room(self, room: Room):
+        """Put a room and its players into Redis, unless another worker already did"""
+        state_key, conns_key, players_key = self._keys(room.room_id)
+        created = await self.redis.set(state_key, model_to_json(room, exclude={"players"}),
+                                       ex=INACTIVE_ROOM_TTL, nx=True)
+        if created and room.players:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.sadd(conns_key, *room.players)
+            pipe.hset(players_key, mapping={uid: model_to_json(player) for uid, player in room.players.items()})
+            pipe.expire(conns_key, INACTIVE_ROOM_TTL)
+            pipe.expire(players_key, INACTIVE_ROOM_TTL)
+            await pipe.execute()
+    
+    async def _sync_room(self, room_id: str, force: bool = False) -> Optional[Room]:
+        """Get a room, re-reading it from Redis when the local copy is older than ROOM_CACHE_TTL"""
+        room = self.active_rooms.get(room_id)
+        if not self.redis:
+            return room
+        if room is not None and not force and monotonic() - self._synced_at.get(room_id, 0) < ROOM_CACHE_TTL:
+            return room
+        
+        state_key, conns_key, players_key = self._keys(room_id)
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.get(state_key)
+            pipe.smembers(conns_key)
+            pipe.hgetall(players_key)
+            state, members, shared_players = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to read shared room {room_id}: {e}")
+            return room  # Keep serving the local copy until Redis answers again
+        
+        if not state:
+            # Closed by another worker, or expired
+            self._forget_room(room_id)
+            return None
+        
+        if room is None or state != self._shared_state.get(room_id):
+            old_players = room.players if room else {}
+            room = model_from_json(Room, state)
+            room.players = old_players
+            self._state_cache.pop(room_id, None)
+        
+        # Members decide who is in the room; players known locally keep their object and position
+        members = {sys.intern(uid.decode()) for uid in members}
+        players = {uid: player for uid, player in room.players.items() if uid in members}
+        for uid in members:
+            if uid not in players and uid.encode() in shared_players:
+                # As of its worker's last positions tick
+                players[uid] = model_from_json(PlayerState, shared_players[uid.encode()])
+        room.players = players
+        
+        self.active_rooms[room_id] = room
+        self._shared_state[room_id] = state
+        self._synced_at[room_id] = monotonic()
+        return room
+    
+    async def share_positions(self, room_id: str, user_uids: Iterable[str]):
+        """Write the current state of this worker's moved players to Redis, for workers that load them later"""
+        room = self.active_rooms.get(room_id)
+        if not self.redis or not room:
+            return
+        
+        # Players that left are skipped, so their entry is not written back
+        players = {uid: model_to_json(room.players[uid]) for uid in user_uids if uid in room.players}
+        if players:
+            await self.redis.hset(self._keys(room_id)[2], mapping=players)
+    
+    async def _add_shared_player(self, room: Room, player: PlayerState) -> bool:
+        """Add a player to a room's Redis member set, unless the room is full or gone"""
+        state_key, conns_key, players_key = self._keys(room.room_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # Joins and leaves on other workers restart the check instead of overfilling the room
+                    await pipe.watch(state_key, conns_key)
+                    if not await pipe.exists(state_key):
+                        return False
+                    if await pipe.scard(conns_key) >= room.max_players:
+                        return False
+                    
+                    pipe.multi()
+                    pipe.sadd(conns_key, player.uid)
+                    pipe.hset(players_key, player.uid, model_to_json(player))
+                    pipe.expire(conns_key, INACTIVE_ROOM_TTL)
+                    pipe.expire(players_key, INACTIVE_ROOM_TTL)
+                    await pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+    
+    async def _remove_shared_player(self, room_id: str, user_uid: str) -> Optional[int]:
+        """Remove a player from a room's Redis member set, closing the room when it empties.
+        
+        Returns the number of players left, or None if the player was not in the room.
+        """
+        state_key, conns_key, players_key = self._keys(room_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(conns_key)
+                    if not await pipe.sismember(conns_key, user_uid):
+                        return None
+                    remaining = await pipe.scard(conns_key) - 1
+                    
+                    pipe.multi()
+                    pipe.srem(conns_key, user_uid)
+                    pipe.hdel(players_key, user_uid)
+                    if remaining == 0:
+                        # The last player out closes the room for every worker
+                        pipe.delete(state_key, players_key)
+                    await pipe.execute()
+                    return remaining
+                except WatchError:
+                    continue
+    
+    async def _change_shared_state(self, room_id: str, change: Callable[[Room], bool]) -> bool:
+        """Apply change to the latest shared state of a room, redoing it if another worker wrote in between"""
+        state_key = self._keys(room_id)[0]
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(state_key)
+                    state = await pipe.get(state_key)
+                    if not state:
+                        return False
+                    room = model_from_json(Room, state)
+                    if not change(room):
+                        return False
+                    
+                    pipe.multi()
+                    pipe.set(state_key, model_to_json(room, exclude={"players"}), ex=INACTIVE_ROOM_TTL)
+                    await pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+    
+    async def _change_room(self, room_id: str, change: Callable[[Room], bool]) -> bool:
+        """Apply change to a room's state, in Redis when configured; change returns False to leave it as is"""
+        if self.redis:
+            if not await self._change_shared_state(room_id, change):
+                return False
+            await self._sync_room(room_id, force=True)
+            return True
+        
+        room = self.active_rooms.get(room_id)
+        if not room or not change(room):
+            return False
+        self._state_cache.pop(room_id, None)
+        return True
         
     async def create_room(self, room_name: str, creator_uid: str, creator_username: str) -> Optional[str]:
         """Create a new room"""
@@ -37,9 +229,9 @@ class RoomManager:
             success = await db.create_room(room)
             if success:
                 self.active_rooms[room.room_id] = room
-                if room.room_id not in self.player_connections:
-                    self.player_connections[room.room_id] = set()
-                self.player_connections[room.room_id].add(creator_uid)
+                if self.redis:
+                    await self._seed_shared_room(room)
+                    await self._sync_room(room.room_id, force=True)
                 
                 logger.info(f"Room {room.room_id} created by {creator_username}")
                 return room.room_id
@@ -52,20 +244,20 @@ class RoomManager:
     async def join_room(self, room_id: str, user_uid: str, username: str) -> bool:
         """Join an existing room"""
         try:
-            # Get room from memory or database
-            room = self.active_rooms.get(room_id)
+            # Get room from memory, Redis or database
+            room = await self._sync_room(room_id)
             if not room:
                 room = await db.get_room(room_id)
-                if room:
-                    self.active_rooms[room_id] = room
+                if room and room.is_active:
+                    if self.redis:
+                        await self._seed_shared_room(room)
+                        room = await self._sync_room(room_id, force=True)
+                    else:
+                        self.active_rooms[room_id] = room
             
             if not room or not room.is_active:
                 return False
             
-            # Check if room is full
-            if len(room.players) >= room.max_players:
-                return False
-            
             # Create player state
             player = PlayerState(
                 uid=user_uid,
@@ -74,16 +266,20 @@ class RoomManager:
                 is_connected=True
             )
             
-            # Add player to room
-            success = room.add_player(player)
+            # Add player to room; with Redis the shared member set decides if it is full
+            if self.redis:
+                success = await self._add_shared_player(room, player)
+                if success:
+                    room = await self._sync_room(room_id, force=True)
+            else:
+                # Check if room is full
+                if len(room.players) >= room.max_players:
+                    return False
+                success = room.add_player(player)
+            
             if success:
-                # Update database
-                await db.update_room(room)
-                
-                # Update connections
-                if room_id not in self.player_connections:
-                    self.player_connections[room_id] = set()
-                self.player_connections[room_id].add(user_uid)
+                # Update database; only this player's entry, so other workers' joins are kept
+                await db.update_room_player(room_id, user_uid, player.to_bson())
                 
                 logger.info(f"Player {username} joined room {room_id}")
                 return True
@@ -96,32 +292,36 @@ class RoomManager:
     async def leave_room(self, room_id: str, user_uid: str) -> bool:
         """Leave a room"""
         try:
-            room = self.active_rooms.get(room_id)
+            room = await self._sync_room(room_id)
             if not room:
                 return False
             
-            # Remove player from room
-            success = room.remove_player(user_uid)
-            if success:
-                # Update connections
-                if room_id in self.player_connections:
-                    self.player_connections[room_id].discard(user_uid)
-                
-                # If room is empty, deactivate it
-                if len(room.players) == 0:
-                    room.is_active = False
-                    if room_id in self.active_rooms:
-                        del self.active_rooms[room_id]
-                    if room_id in self.player_connections:
-                        del self.player_connections[room_id]
-                
-                # Update database
-                await db.update_room(room)
-                
-                logger.info(f"Player {user_uid} left room {room_id}")
-                return True
+            # Remove player from room; with Redis the shared member set decides if it is empty
+            if self.redis:
+                remaining = await self._remove_shared_player(room_id, user_uid)
+                if remaining is None:
+                    return False
+                room.remove_player(user_uid)
+                is_empty = remaining == 0
+            else:
+                if not room.remove_player(user_uid):
+                    return False
+                is_empty = len(room.players) == 0
             
-            return False
+            # If room is empty, deactivate it
+            if is_empty:
+                room.is_active = False
+                self._forget_room(room_id)
+            
+            # Update database; only this player's entry, so other workers' players are kept
+            await db.update_room_player(room_id, user_uid)
+            if not room.is_active:
+                # Other changes are written behind; closing the room is persisted right away
+                await db.update_room_fields(room_id, {"is_active": False})
+                await db.flush_room_updates()
+            
+            logger.info(f"Player {user_uid} left room {room_id}")
+            return True
         except Exception as e:
             logger.error(f"Failed to leave room: {e}")
             return False
@@ -133,14 +333,16 @@ class RoomManager:
             if not room:
                 return False
             
-            # Find and update player
-            for player in room.players:
-                if player.uid == user_uid:
-                    player.position = {"x": x, "y": y}
-                    # Don't update database for every position change - too frequent
-                    return True
+            player = room.players.get(user_uid)
+            if not player:
+                return False
             
-            return False
+            # Don't update database (or Redis) for every position change - too frequent.
+            # Updated in place to avoid allocating a dict per move
+            position = player.position
+            position["x"] = x
+            position["y"] = y
+            return True
         except Exception as e:
             logger.error(f"Failed to update player position: {e}")
             return False
@@ -148,20 +350,21 @@ class RoomManager:
     async def complete_task(self, room_id: str, user_uid: str, task_id: str) -> bool:
         """Mark a task as completed"""
         try:
-            room = self.active_rooms.get(room_id)
-            if not room:
-                return False
-            
-            # Add to completed tasks if not already there
-            if task_id not in room.completed_tasks:
-                room.completed_tasks.append(task_id)
+            def complete(room: Room) -> bool:
+                # Add to completed tasks if not already there
+                if task_id in room.completed_tasks:
+                    return False
+                room.completed_tasks.add(task_id)
                 
                 # Remove from active tasks if present
                 if task_id in room.active_tasks:
                     room.active_tasks.remove(task_id)
-                
+                return True
+            
+            if await self._change_room(room_id, complete):
                 # Update database
-                await db.update_room(room)
+                await db.update_room_fields(room_id, add_to_set={"completed_tasks": task_id}, 
+                                            pull={"active_tasks": task_id})
                 
                 logger.info(f"Task {task_id} completed in room {room_id} by {user_uid}")
                 return True
@@ -174,12 +377,13 @@ class RoomManager:
     async def start_new_floor(self, room_id: str) -> bool:
         """Progress room to next floor"""
         try:
-            room = self.active_rooms.get(room_id)
+            room = await self._sync_room(room_id)
             if not room:
                 return False
             
             # Get house info to check max floors
-            house = await db.get_house(room.current_house)
+            house_id = room.current_house
+            house = await db.get_house(house_id)
             if not house:
                 return False
             
@@ -187,18 +391,33 @@ class RoomManager:
             if room.current_floor >= house.floors:
                 return False  # Already at max floor
             
-            # Progress to next floor
-            room.current_floor += 1
-            room.completed_tasks = []  # Reset completed tasks for new floor
-            
             # Load tasks for new floor
-            tasks = await db.get_tasks_for_house_floor(room.current_house, room.current_floor)
-            room.active_tasks = [task.id for task in tasks]
+            next_floor = room.current_floor + 1
+            tasks = await db.get_tasks_for_house_floor(house_id, next_floor)
+            task_ids = [task.id for task in tasks]
+            
+            def progress(room: Room) -> bool:
+                # Another worker may have moved the room on while the tasks were loading
+                if room.current_house != house_id or room.current_floor != next_floor - 1:
+                    return False
+                
+                # Progress to next floor
+                room.current_floor = next_floor
+                room.completed_tasks = set()  # Reset completed tasks for new floor
+                room.active_tasks = list(task_ids)
+                return True
+            
+            if not await self._change_room(room_id, progress):
+                return False
             
             # Update database
-            await db.update_room(room)
+            await db.update_room_fields(room_id, {
+                "current_floor": next_floor,
+                "completed_tasks": [],
+                "active_tasks": task_ids
+            })
             
-            logger.info(f"Room {room_id} progressed to floor {room.current_floor}")
+            logger.info(f"Room {room_id} progressed to floor {next_floor}")
             return True
         except Exception as e:
             logger.error(f"Failed to start new floor: {e}")
@@ -207,26 +426,39 @@ class RoomManager:
     async def change_house(self, room_id: str, house_id: int) -> bool:
         """Change the current house for the room"""
         try:
-            room = self.active_rooms.get(room_id)
+            room = await self._sync_room(room_id)
             if not room:
                 return False
             
-            # Validate house exists
-            house = await db.get_house(house_id)
+            # Validate house exists, loading its first floor tasks at the same time
+            house, tasks = await asyncio.gather(
+                db.get_house(house_id),
+                db.get_tasks_for_house_floor(house_id, 1)
+            )
             if not house:
                 return False
+            task_ids = [task.id for task in tasks]
             
-            # Update room
-            room.current_house = house_id
-            room.current_floor = 1
-            room.completed_tasks = []
+            def move(room: Room) -> bool:
+                # Update room
+                room.current_house = house_id
+                room.current_floor = 1
+                room.completed_tasks = set()
+                
+                # Activate tasks for first floor
+                room.active_tasks = list(task_ids)
+                return True
             
-            # Load tasks for first floor
-            tasks = await db.get_tasks_for_house_floor(house_id, 1)
-            room.active_tasks = [task.id for task in tasks]
+            if not await self._change_room(room_id, move):
+                return False
             
             # Update database
-            await db.update_room(room)
+            await db.update_room_fields(room_id, {
+                "current_house": house_id,
+                "current_floor": 1,
+                "completed_tasks": [],
+                "active_tasks": task_ids
+            })
             
             logger.info(f"Room {room_id} changed to house {house_id}")
             return True
@@ -241,55 +473,80 @@ class RoomManager:
     def get_room_players(self, room_id: str) -> List[PlayerState]:
         """Get all players in a room"""
         room = self.active_rooms.get(room_id)
-        return room.players if room else []
+        return room.player_list if room else []
+    
+    def get_player_position(self, room_id: str, user_uid: str) -> Optional[Dict[str, float]]:
+        """Get a player's last known position in a room"""
+        room = self.active_rooms.get(room_id)
+        player = room.players.get(user_uid) if room else None
+        return player.position if player else None
     
-    def get_connected_players(self, room_id: str) -> Set[str]:
+    async def get_connected_players(self, room_id: str) -> AbstractSet[str]:
         """Get set of connected player UIDs in room"""
-        return self.player_connections.get(room_id, set())
+        # Derived from the room's players, which with Redis follow the room's shared member set
+        room = await self._sync_room(room_id)
+        return room.players.keys() if room else frozenset()
+    
+    def _floor_complete(self, room: Room, tasks: List[Task]) -> bool:
+        """Check if every one of the floor's tasks is in the room's completed tasks"""
+        return all(task.id in room.completed_tasks for task in tasks)
     
     async def check_floor_completion(self, room_id: str) -> bool:
         """Check if all tasks on current floor are completed"""
         try:
-            room = self.active_rooms.get(room_id)
+            room = await self._sync_room(room_id)
             if not room:
                 return False
             
             # Get required tasks for current floor
             tasks = await db.get_tasks_for_house_floor(room.current_house, room.current_floor)
-            required_task_ids = [task.id for task in tasks]
-            
-            # Check if all required tasks are completed
-            return all(task_id in room.completed_tasks for task_id in required_task_ids)
+            return self._floor_complete(room, tasks)
         except Exception as e:
             logger.error(f"Failed to check floor completion: {e}")
             return False
     
     async def get_room_state(self, room_id: str) -> Optional[Dict]:
         """Get complete room state for clients"""
+        parts = await self.get_room_state_parts(room_id)
+        if not parts:
+            return None
+        
+        state, players = parts
+        return {**state, "players": players}
+    
+    async def get_room_state_parts(self, room_id: str) -> Optional[Tuple[Dict, List[Dict]]]:
+        """Get room state as its cached part, which is the same object until it changes, and its players"""
         try:
-            room = self.active_rooms.get(room_id)
+            room = await self._sync_room(room_id)
             if not room:
                 return None
             
-            # Get house info
-            house = await db.get_house(room.current_house)
-            
-            # Get current floor tasks
-            tasks = await db.get_tasks_for_house_floor(room.current_house, room.current_floor)
+            # House, tasks and completion are cached until this manager changes them or sees
+            # them changed in Redis; players are always taken fresh
+            state = self._state_cache.get(room_id)
+            if state is None:
+                # Get house info and current floor tasks
+                house, tasks = await asyncio.gather(
+                    db.get_house(room.current_house),
+                    db.get_tasks_for_house_floor(room.current_house, room.current_floor)
+                )
+                
+                state = {
+                    "room_id": room.room_id,
+                    "room_name": room.name,
+                    "current_house": room.current_house,
+                    "current_floor": room.current_floor,
+                    "house_name": house.name if house else "Unknown",
+                    "max_floors": house.floors if house else 1,
+                    "active_tasks": [task.to_dict() for task in tasks],
+                    "completed_tasks": list(room.completed_tasks),
+                    "tasks_remaining": len(tasks) - len(room.completed_tasks),
+                    "is_floor_complete": self._floor_complete(room, tasks)
+                }
+                self._state_cache[room_id] = state
             
-            return {
-                "room_id": room.room_id,
-                "room_name": room.name,
-                "players": [player.dict() for player in room.players],
-                "current_house": room.current_house,
-                "current_floor": room.current_floor,
-                "house_name": house.name if house else "Unknown",
-                "max_floors": house.floors if house else 1,
-                "active_tasks": [task.dict() for task in tasks],
-                "completed_tasks": room.completed_tasks,
-                "tasks_remaining": len(tasks) - len(room.completed_tasks),
-                "is_floor_complete": await self.check_floor_completion(room_id)
-            }
+            # PlayerState's document form is also its wire form
+            return state, [player.to_bson() for player in room.players.values()]
         except Exception as e:
             logger.error(f"Failed to get room state: {e}")
             return None